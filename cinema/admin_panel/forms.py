@@ -1,8 +1,14 @@
 from django import forms
 from films.models import Film
-from .models import Hall, Session
+from .models import LAST_START_TIME, OPENING_TIME, Hall, Session
 from django.utils import timezone
 
+WEEKDAYS = [
+    (0, 'Пн'), (1, 'Вт'), (2, 'Ср'), (3, 'Чт'),
+    (4, 'Пт'), (5, 'Сб'), (6, 'Вс'),
+]
+MAX_RECURRENCE_DAYS = 92
+
 
 class FilmForm(forms.ModelForm):
     class Meta:
@@ -43,3 +49,58 @@ class SessionForm(forms.ModelForm):
         self.fields['film'].queryset = Film.objects.filter(
             ending__gte=timezone.now().date()
         )
+
+
+class RecurringSessionForm(forms.Form):
+    film = forms.ModelChoiceField(
+        Film.objects.none(), label='Фильм', empty_label='Выберите фильм...',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    halls = forms.ModelMultipleChoiceField(
+        Hall.objects.all(), label='Залы',
+        widget=forms.CheckboxSelectMultiple
+    )
+    start_time = forms.TimeField(
+        label='Время начала',
+        widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'})
+    )
+    date_from = forms.DateField(
+        label='С',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    date_to = forms.DateField(
+        label='По',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=WEEKDAYS, coerce=int, label='Дни недели',
+        initial=[day for day, name in WEEKDAYS],
+        widget=forms.CheckboxSelectMultiple
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['film'].queryset = Film.objects.filter(
+            ending__gte=timezone.now().date()
+        )
+
+    def clean_start_time(self):
+        start_time = self.cleaned_data['start_time']
+        if not OPENING_TIME <= start_time <= LAST_START_TIME:
+            raise forms.ValidationError('Кинотеатр работает с 10:00 до 23:00')
+        return start_time
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to:
+            if date_to < date_from:
+                raise forms.ValidationError(
+                    'Дата окончания раньше даты начала'
+                )
+            if (date_to - date_from).days >= MAX_RECURRENCE_DAYS:
+                raise forms.ValidationError(
+                    f'Не больше {MAX_RECURRENCE_DAYS} дней за раз'
+                )
+        return cleaned_data
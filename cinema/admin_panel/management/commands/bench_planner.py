@@ -0,0 +1,54 @@
+import random
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from admin_panel.models import Hall
+from admin_panel.planner import plan_schedule
+from admin_panel.scheduling import save_sessions
+from cinema.benchmark import scratch_database
+from films.models import Film
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк автоматического планирования расписания'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--halls', type=int, default=20)
+        parser.add_argument('--days', type=int, default=14)
+        parser.add_argument('--films', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            rnd = random.Random(0)
+            today = timezone.localdate()
+            days = [today + timedelta(days=offset)
+                    for offset in range(options['days'])]
+            for number in range(1, options['halls'] + 1):
+                Hall.objects.create(number=number, name=f'Зал {number}')
+            for number in range(options['films']):
+                Film.objects.create(
+                    title=f'Фильм {number}', description='',
+                    time=clock(rnd.randint(1, 2), rnd.randrange(0, 60, 5)),
+                    country='', beginning=today, ending=days[-1],
+                )
+            films = list(Film.objects.all())
+            hall_ids = list(Hall.objects.values_list('pk', flat=True))
+            weights = {film.pk: rnd.choice((1, 1, 2, 3)) for film in films}
+
+            started = time.perf_counter()
+            plan = plan_schedule(films, hall_ids, days, weights)
+            planned = time.perf_counter() - started
+
+            started = time.perf_counter()
+            save_sessions(plan.sessions)
+            saved = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{len(hall_ids)} залов x {len(days)} дней, '
+                f'{len(films)} фильмов: {len(plan.sessions)} сеансов, '
+                f'загрузка {plan.utilization:.1%}, '
+                f'планирование {planned:.3f} с, запись {saved:.3f} с'
+            )
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admin_panel.models import Hall
+from admin_panel.planner import plan_schedule
+from admin_panel.scheduling import save_sessions
+from films.models import Film
+
+
+def parse_weights(values):
+    weights = {}
+    for value in values:
+        slug, _, weight = value.partition('=')
+        try:
+            weights[slug] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверный вес: {value}')
+    return weights
+
+
+class Command(BaseCommand):
+    help = 'Автоматически заполняет расписание залов сеансами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Первый день, ГГГГ-ММ-ДД')
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--hall', type=int, action='append', default=[],
+                            help='Номер зала, по умолчанию все')
+        parser.add_argument('--weight', action='append', default=[],
+                            help='Вес фильма: номер=вес')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать план')
+
+    def handle(self, *args, **options):
+        start = timezone.localdate()
+        if options['start']:
+            start = datetime.strptime(options['start'], '%Y-%m-%d').date()
+        days = [start + timedelta(days=offset)
+                for offset in range(options['days'])]
+
+        halls = Hall.objects.all()
+        if options['hall']:
+            halls = halls.filter(number__in=options['hall'])
+        hall_ids = list(halls.values_list('pk', flat=True))
+        films = list(Film.objects.filter(ending__gte=start,
+                                         beginning__lte=days[-1]))
+        slugs = parse_weights(options['weight'])
+        weights = {film.pk: slugs[film.slug]
+                   for film in films if film.slug in slugs}
+
+        started = time.perf_counter()
+        plan = plan_schedule(films, hall_ids, days, weights)
+        planned = time.perf_counter() - started
+
+        titles = {film.pk: film.title for film in films}
+        for film_id, shows in plan.shows.most_common():
+            self.stdout.write(f'{titles[film_id]}: {shows}')
+        self.stdout.write(
+            f'Сеансов: {len(plan.sessions)}, залов: {len(hall_ids)}, '
+            f'дней: {len(days)}, загрузка: {plan.utilization:.1%}, '
+            f'планирование: {planned:.3f} с'
+        )
+        if options['dry_run']:
+            return
+
+        started = time.perf_counter()
+        try:
+            save_sessions(plan.sessions)
+        except ValidationError as error:
+            raise CommandError('; '.join(error.messages))
+        self.stdout.write(
+            f'Сохранено за {time.perf_counter() - started:.3f} с'
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from admin_panel.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики статистики по исходным таблицам'
+
+    def handle(self, *args, **options):
+        drift = reconcile()
+        for (key, day), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f'{key} {day}: было {stored}, стало {actual}')
+        self.stdout.write(f'Исправлено счётчиков: {len(drift)}')
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:42
+
+import datetime
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+TOTAL = datetime.date(1, 1, 1)
+
+
+def fill_counters(apps, schema_editor):
+    # Счётчики на момент миграции, без admin_panel.stats
+    Film = apps.get_model('films', 'Film')
+    Hall = apps.get_model('admin_panel', 'Hall')
+    Session = apps.get_model('admin_panel', 'Session')
+    Order = apps.get_model('cashier_panel', 'Order')
+    StatCounter = apps.get_model('admin_panel', 'StatCounter')
+
+    counters = Counter()
+    counters['films', TOTAL] = Film.objects.count()
+    counters['halls', TOTAL] = Hall.objects.count()
+    counters['orders', TOTAL] = Order.objects.count()
+    counters['orders_confirmed', TOTAL] = Order.objects.filter(
+        status='confirmed'
+    ).count()
+    counters['orders_cancelled', TOTAL] = Order.objects.filter(
+        status='cancelled'
+    ).count()
+    grouped = (
+        ('films_ending', Film.objects.values_list('ending')),
+        ('sessions', Session.objects.values_list('date')),
+        ('orders', Order.objects.annotate(
+            day=TruncDate('created_at')
+        ).values_list('day')),
+    )
+    for key, queryset in grouped:
+        for day, value in queryset.annotate(n=Count('id')).order_by():
+            counters[key, day] = value
+
+    StatCounter.objects.all().delete()
+    StatCounter.objects.bulk_create([
+        StatCounter(key=key, day=day, value=value)
+        for (key, day), value in counters.items()
+        if value
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0008_auto_20251128_2334'),
+        ('cashier_panel', '0006_ticketsequence'),
+        ('films', '0005_auto_20251120_1530'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, verbose_name='Показатель')),
+                ('day', models.DateField(default=datetime.date(1, 1, 1), verbose_name='День')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'счётчик статистики',
+                'verbose_name_plural': 'Счётчики статистики',
+                'unique_together': {('key', 'day')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
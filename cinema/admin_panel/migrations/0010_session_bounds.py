@@ -0,0 +1,66 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:05
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+CLEANING_TIME = timedelta(minutes=30)
+
+
+def film_duration(film):
+    if not film.time:
+        return timedelta()
+    return timedelta(hours=film.time.hour, minutes=film.time.minute)
+
+
+def session_bounds(day, start_time, duration):
+    starts_at = timezone.make_aware(datetime.combine(day, start_time))
+    return starts_at, starts_at + duration + CLEANING_TIME
+
+
+def fill_bounds(apps, schema_editor):
+    Session = apps.get_model('admin_panel', 'Session')
+    sessions = list(Session.objects.select_related('film'))
+    for session in sessions:
+        session.starts_at, session.ends_at = session_bounds(
+            session.date, session.start_time, film_duration(session.film)
+        )
+    Session.objects.bulk_update(
+        sessions, ['starts_at', 'ends_at'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0009_statcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Начало'),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Окончание с уборкой'),
+        ),
+        migrations.RunPython(fill_bounds, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='session',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, verbose_name='Начало'),
+        ),
+        migrations.AlterField(
+            model_name='session',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, verbose_name='Окончание с уборкой'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['hall', 'starts_at', 'ends_at'], name='admin_panel_hall_id_bdd874_idx'),
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from datetime import datetime, time, timedelta
+from django.utils import timezone
+from cinema.transactions import immediate_atomic
+from datetime import date, datetime, time, timedelta
 
 User = get_user_model()
 
@@ -12,6 +16,8 @@ class Hall(models.Model):
     count_rows = models.IntegerField('Количество рядов', default=10)
     count_places = models.IntegerField('Количество мест в ряду', default=10)
     price = models.IntegerField('Цена билета', default=500)
+    updated_at = models.DateTimeField('Изменён', auto_now=True,
+                                      db_index=True)
 
     class Meta:
         verbose_name = 'зал'
@@ -22,6 +28,56 @@ class Hall(models.Model):
         return f"{self.number}. {self.name}" if self.name else f"Зал {self.number}"
 
 
+OPENING_TIME = time(10, 0)
+LAST_START_TIME = time(23, 0)
+CLOSING_TIME = time(1, 0)
+CLEANING_TIME = timedelta(minutes=30)
+MAX_SESSION_SPAN = timedelta(hours=15)
+ALMOST_FULL_SHARE = 0.1
+
+
+def film_duration(film):
+    if not film.time:
+        return timedelta()
+    return timedelta(hours=film.time.hour, minutes=film.time.minute)
+
+
+def session_bounds(day, start_time, duration):
+    starts_at = timezone.make_aware(datetime.combine(day, start_time))
+    return starts_at, starts_at + duration + CLEANING_TIME
+
+
+def closing_at(day):
+    return timezone.make_aware(
+        datetime.combine(day + timedelta(days=1), CLOSING_TIME)
+    )
+
+
+class SessionQuerySet(models.QuerySet):
+    def overlapping(self, hall, starts_at, ends_at):
+        # Сеанс не длиннее MAX_SESSION_SPAN, поэтому нижняя граница
+        # по starts_at ограничивает просмотр индекса.
+        return self.filter(
+            hall=hall,
+            starts_at__gt=starts_at - MAX_SESSION_SPAN,
+            starts_at__lt=ends_at,
+            ends_at__gt=starts_at,
+        )
+
+    def with_availability(self):
+        from cashier_panel.models import Booking
+
+        taken = Booking.objects.filter(session_id=OuterRef('pk')).filter(
+            Q(is_booked=True) | Q(held_until__gt=timezone.now())
+        ).order_by().values('session_id').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.annotate(
+            seats_total=F('hall__count_rows') * F('hall__count_places'),
+            seats_taken=Coalesce(Subquery(taken), 0),
+        )
+
+
 class Session(models.Model):
     film = models.ForeignKey(
         'films.Film',
@@ -36,47 +92,77 @@ class Session(models.Model):
     date = models.DateField('Дата сеанса')
     start_time = models.TimeField('Время начала')
     end_time = models.TimeField('Время окончания', blank=True, null=True)
+    starts_at = models.DateTimeField('Начало', editable=False)
+    ends_at = models.DateTimeField('Окончание с уборкой', editable=False)
+    updated_at = models.DateTimeField('Изменён', auto_now=True,
+                                      db_index=True)
+
+    objects = SessionQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'сеанс'
         verbose_name_plural = 'Сеансы'
         ordering = ('date', 'start_time')
         unique_together = ('hall', 'date', 'start_time')
+        indexes = [
+            models.Index(fields=['hall', 'starts_at', 'ends_at']),
+        ]
 
     def __str__(self):
         return f"{self.film.title} - {self.hall.name} - {self.date} {self.start_time}"
 
+    @property
+    def seats_free(self):
+        return max(self.seats_total - self.seats_taken, 0)
+
+    @property
+    def sold_out(self):
+        return self.seats_free == 0
+
+    @property
+    def almost_full(self):
+        return self.seats_free <= self.seats_total * ALMOST_FULL_SHARE
+
     def clean(self):
-        if self.start_time < time(10, 0) or self.start_time > time(23, 0):
+        if (self.start_time < OPENING_TIME
+                or self.start_time > LAST_START_TIME):
             raise ValidationError('Кинотеатр работает с 10:00 до 23:00')
 
-        if self.film.time:
-            film_duration = timedelta(
-                hours=self.film.time.hour,
-                minutes=self.film.time.minute
+        self.starts_at, self.ends_at = session_bounds(
+            self.date, self.start_time, film_duration(self.film)
+        )
+        self.end_time = timezone.localtime(self.ends_at).time()
+
+        if self.ends_at > closing_at(self.date):
+            raise ValidationError('Сеанс должен заканчиваться до 01:00')
+
+        overlapping = Session.objects.overlapping(
+            self.hall_id, self.starts_at, self.ends_at
+        ).exclude(pk=self.pk).select_related('film', 'hall').order_by(
+            'starts_at'
+        ).first()
+        if overlapping is not None:
+            raise ValidationError(
+                f'Сеанс пересекается с существующим сеансом: {overlapping}'
             )
-            start_datetime = datetime.combine(self.date, self.start_time)
-            end_datetime = start_datetime + film_duration + timedelta(minutes=30)
-            self.end_time = end_datetime.time()
-
-            if end_datetime.time() > time(1, 0) and end_datetime.hour != 0:
-                next_day_end = datetime.combine(self.date + timedelta(days=1),
-                                                time(1, 0))
-                if end_datetime > next_day_end:
-                    raise ValidationError('Сеанс должен заканчиваться до 01:00')
-
-        overlapping_sessions = Session.objects.filter(
-            hall=self.hall,
-            date=self.date
-        ).exclude(pk=self.pk)
-
-        for session in overlapping_sessions:
-            if (self.start_time < session.end_time and
-                    self.end_time > session.start_time):
-                raise ValidationError(
-                    f'Сеанс пересекается с существующим сеансом: {session}'
-                )
 
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        with immediate_atomic():
+            self.clean()
+            super().save(*args, **kwargs)
+
+
+class StatCounter(models.Model):
+    TOTAL = date(1, 1, 1)
+
+    key = models.CharField('Показатель', max_length=32)
+    day = models.DateField('День', default=TOTAL)
+    value = models.BigIntegerField('Значение', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик статистики'
+        verbose_name_plural = 'Счётчики статистики'
+        unique_together = ('key', 'day')
+
+    def __str__(self):
+        return f"{self.key} {self.day}: {self.value}"
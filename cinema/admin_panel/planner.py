@@ -0,0 +1,71 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import CLEANING_TIME, closing_at, film_duration
+from .scheduling import (busy_intervals, free_gaps, last_start_at,
+                         new_session, opening_at, round_up)
+
+
+@dataclass
+class Plan:
+    sessions: list = field(default_factory=list)
+    shows: Counter = field(default_factory=Counter)
+    capacity: timedelta = timedelta()
+    occupied: timedelta = timedelta()
+
+    @property
+    def utilization(self):
+        if not self.capacity:
+            return 0.0
+        return self.occupied / self.capacity
+
+
+def plan_schedule(films, hall_ids, days, weights=None):
+    """Плотно заполняет свободное время залов сеансами активных фильмов.
+
+    В каждом промежутке жадно ставится фильм с наименьшим числом показов
+    относительно его веса; при равенстве — более длинный, чтобы меньше
+    времени оставалось пустым.
+    """
+    weights = weights or {}
+    films = [film for film in films
+             if film_duration(film) and weights.get(film.pk, 1) > 0]
+    lengths = {film.pk: film_duration(film) + CLEANING_TIME for film in films}
+    busy = busy_intervals(hall_ids, days)
+    plan = Plan()
+
+    def priority(film):
+        return ((plan.shows[film.pk] + 1) / weights.get(film.pk, 1),
+                -lengths[film.pk], film.pk)
+
+    for day in days:
+        opening, closing = opening_at(day), closing_at(day)
+        last_start = last_start_at(day)
+        day_films = [film for film in films
+                     if film.beginning <= day <= film.ending]
+        for hall_id in hall_ids:
+            plan.capacity += closing - opening
+            day_busy = busy[hall_id, day]
+            plan.occupied += sum(
+                (min(ends_at, closing) - max(starts_at, opening)
+                 for starts_at, ends_at in day_busy), timedelta()
+            )
+            for gap_start, gap_end in free_gaps(day_busy, opening, closing):
+                start = round_up(gap_start, opening)
+                while start <= last_start:
+                    fitting = [film for film in day_films
+                               if start + lengths[film.pk] <= gap_end]
+                    if not fitting:
+                        break
+                    film = min(fitting, key=priority)
+                    session = new_session(
+                        film, hall_id, day, timezone.localtime(start).time()
+                    )
+                    plan.sessions.append(session)
+                    plan.shows[film.pk] += 1
+                    plan.occupied += session.ends_at - session.starts_at
+                    start = round_up(session.ends_at, opening)
+    return plan
@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from cinema.cache import invalidate, invalidate_on_commit, namespace
+from cinema.transactions import immediate_atomic
+from films.models import Film
+from films.schedule import invalidate_days
+from . import stats
+from .models import (CLEANING_TIME, LAST_START_TIME, MAX_SESSION_SPAN,
+                     OPENING_TIME, Hall, Session, closing_at, film_duration,
+                     session_bounds)
+
+SLOT_STEP = timedelta(minutes=5)
+MAX_GRID_DAYS = 31
+SCHEDULE_DAYS = 14
+
+
+def opening_at(day):
+    return timezone.make_aware(datetime.combine(day, OPENING_TIME))
+
+
+def last_start_at(day):
+    return timezone.make_aware(datetime.combine(day, LAST_START_TIME))
+
+
+def round_up(moment, origin):
+    offset = (moment - origin) % SLOT_STEP
+    return moment + SLOT_STEP - offset if offset else moment
+
+
+def free_gaps(busy, start, end):
+    """Свободные промежутки между отсортированными занятыми интервалами."""
+    gaps = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if cursor >= end:
+            break
+        if busy_start > cursor:
+            gaps.append((cursor, min(busy_start, end)))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def day_slots(day, busy, length):
+    """Начала сеансов, плотно уложенные в свободные промежутки дня."""
+    opening = opening_at(day)
+    last_start = last_start_at(day)
+    slots = []
+    for gap_start, gap_end in free_gaps(busy, opening, closing_at(day)):
+        start = round_up(gap_start, opening)
+        while start <= last_start and start + length <= gap_end:
+            slots.append(start)
+            start = round_up(start + length, opening)
+    return slots
+
+
+def busy_intervals(hall_ids, days):
+    sessions = Session.objects.filter(
+        hall__in=hall_ids,
+        starts_at__gte=opening_at(min(days)),
+        starts_at__lt=closing_at(max(days)),
+    ).order_by('hall_id', 'starts_at').values_list(
+        'hall_id', 'starts_at', 'ends_at'
+    )
+    return group_busy(sessions)
+
+
+def group_busy(sessions):
+    busy = defaultdict(list)
+    for hall_id, starts_at, ends_at in sessions:
+        day = timezone.localtime(starts_at).date()
+        busy[hall_id, day].append((starts_at, ends_at))
+    return busy
+
+
+def slot_grid(film, hall_ids, days, busy=None):
+    """Свободные начала сеансов фильма по залам и датам одним запросом."""
+    if not hall_ids or not days:
+        return {}
+    length = film_duration(film) + CLEANING_TIME
+    if busy is None:
+        busy = busy_intervals(hall_ids, days)
+    return {
+        day: {
+            hall_id: day_slots(day, busy[hall_id, day], length)
+            for hall_id in hall_ids
+        }
+        for day in days
+    }
+
+
+def format_slots(slots):
+    return [timezone.localtime(slot).strftime('%H:%M') for slot in slots]
+
+
+def new_session(film, hall_id, day, start_time):
+    session = Session(film=film, hall_id=hall_id, date=day,
+                      start_time=start_time)
+    session.starts_at, session.ends_at = session_bounds(
+        day, start_time, film_duration(film)
+    )
+    session.end_time = timezone.localtime(session.ends_at).time()
+    return session
+
+
+def window_error(session):
+    if not OPENING_TIME <= session.start_time <= LAST_START_TIME:
+        return 'Кинотеатр работает с 10:00 до 23:00'
+    if session.ends_at > closing_at(session.date):
+        return 'Сеанс должен заканчиваться до 01:00'
+    return None
+
+
+def existing_overlap(intervals, starts, session):
+    index = bisect_left(starts, session.ends_at) - 1
+    while index >= 0 and starts[index] > session.starts_at - MAX_SESSION_SPAN:
+        if intervals[index][1] > session.starts_at:
+            return intervals[index][0]
+        index -= 1
+    return None
+
+
+def find_conflicts(sessions, busy):
+    """Проверяет новые сеансы в памяти: окно работы, существующие сеансы
+    и пересечения друг с другом. Возвращает [(сеанс, сообщение)]."""
+    conflicts = []
+    halls = defaultdict(list)
+    for session in sessions:
+        halls[session.hall_id].append(session)
+
+    existing = defaultdict(list)
+    for (hall_id, day), day_busy in busy.items():
+        existing[hall_id].extend(day_busy)
+
+    for hall_id, candidates in halls.items():
+        intervals = sorted(existing[hall_id])
+        starts = [starts_at for starts_at, ends_at in intervals]
+        accepted_end = None
+        for session in sorted(candidates, key=lambda item: item.starts_at):
+            error = window_error(session)
+            if error is None:
+                overlap = existing_overlap(intervals, starts, session)
+                if overlap is not None:
+                    error = ('Пересекается с существующим сеансом в '
+                             f'{timezone.localtime(overlap):%d.%m %H:%M}')
+                elif accepted_end and session.starts_at < accepted_end:
+                    error = 'Пересекается с другим новым сеансом'
+            if error:
+                conflicts.append((session, error))
+            else:
+                accepted_end = session.ends_at
+    return conflicts
+
+
+def insert_sessions(sessions, batch_size=500):
+    """Вставляет сеансы без конфликтов одной пакетной записью.
+
+    Возвращает созданные сеансы и список конфликтов [(сеанс, сообщение)].
+    """
+    if not sessions:
+        return [], []
+    with immediate_atomic():
+        busy = busy_intervals(
+            {session.hall_id for session in sessions},
+            {session.date for session in sessions},
+        )
+        conflicts = find_conflicts(sessions, busy)
+        rejected = {id(session) for session, error in conflicts}
+        valid = [session for session in sessions
+                 if id(session) not in rejected]
+        created = Session.objects.bulk_create(valid, batch_size=batch_size)
+        stats.bump_many(Counter(
+            (stats.SESSIONS, session.date) for session in created
+        ))
+        if created:
+            days = {session.date for session in created}
+            invalidate_on_commit('planner', 'dashboard')
+            transaction.on_commit(lambda: invalidate_days(days))
+    return created, conflicts
+
+
+def save_sessions(sessions, batch_size=500):
+    """Как insert_sessions, но при любом конфликте ничего не сохраняет."""
+    with immediate_atomic():
+        created, conflicts = insert_sessions(sessions, batch_size)
+        if conflicts:
+            raise ValidationError([
+                f'{session.date:%d.%m.%Y} {session.start_time:%H:%M}: {error}'
+                for session, error in conflicts
+            ])
+    return created
+
+
+def expand_recurrence(film, hall_ids, start_time, date_from, date_to,
+                      weekdays):
+    sessions = []
+    day = date_from
+    while day <= date_to:
+        if day.weekday() in weekdays:
+            sessions.extend(new_session(film, hall_id, day, start_time)
+                            for hall_id in hall_ids)
+        day += timedelta(days=1)
+    return sessions
+
+
+class ScheduleSnapshot:
+    """Залы, активные фильмы и сеансы на SCHEDULE_DAYS дней вперёд."""
+
+    def __init__(self, date_from):
+        self.date_from = date_from
+        self.date_to = date_from + timedelta(days=SCHEDULE_DAYS)
+        self.halls = list(Hall.objects.all())
+        self.films = list(Film.objects.filter(ending__gte=date_from))
+        self.sessions = list(Session.objects.filter(
+            date__range=[date_from, self.date_to]
+        ).select_related('film', 'hall'))
+
+    def hall(self, pk):
+        return next((hall for hall in self.halls if str(hall.pk) == pk), None)
+
+    def film(self, pk):
+        return next((film for film in self.films if str(film.pk) == pk), None)
+
+    def covers(self, day):
+        return self.date_from <= day <= self.date_to
+
+    def busy(self):
+        return group_busy(sorted(
+            (session.hall_id, session.starts_at, session.ends_at)
+            for session in self.sessions
+        ))
+
+
+def invalidate_schedule():
+    invalidate('planner')
+
+
+def schedule_snapshot(date_from=None):
+    date_from = date_from or timezone.localdate()
+    return namespace('planner').get_or_set(
+        f'snapshot:{date_from.isoformat()}',
+        lambda: ScheduleSnapshot(date_from),
+    )
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from cinema.cache import watch
+from . import stats
+from .models import Hall, Session
+
+
+@receiver(post_init, sender=Session)
+def remember_session_date(sender, instance, **kwargs):
+    instance._stats_date = instance.__dict__.get('date')
+
+
+@receiver(post_save, sender=Session)
+def count_saved_session(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.SESSIONS, 1, instance.date)
+    else:
+        stats.move(stats.SESSIONS, instance._stats_date, instance.date)
+    instance._stats_date = instance.date
+
+
+@receiver(post_delete, sender=Session)
+def count_deleted_session(sender, instance, **kwargs):
+    stats.bump(stats.SESSIONS, -1, instance._stats_date)
+    stats.bump(stats.DELETIONS)
+
+
+@receiver(post_save, sender=Hall)
+def count_saved_hall(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.HALLS)
+
+
+@receiver(post_delete, sender=Hall)
+def count_deleted_hall(sender, instance, **kwargs):
+    stats.bump(stats.HALLS, -1)
+    stats.bump(stats.DELETIONS)
+
+
+watch(Session, 'planner', 'dashboard')
+watch(Hall, 'planner', 'dashboard')
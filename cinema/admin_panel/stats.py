@@ -0,0 +1,152 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from cinema.transactions import immediate_atomic
+from .models import StatCounter
+
+TOTAL = StatCounter.TOTAL
+
+FILMS = 'films'
+FILMS_ENDING = 'films_ending'
+HALLS = 'halls'
+SESSIONS = 'sessions'
+ORDERS = 'orders'
+ORDERS_CONFIRMED = 'orders_confirmed'
+ORDERS_CANCELLED = 'orders_cancelled'
+DELETIONS = 'deletions'
+
+
+def bump(key, delta=1, day=TOTAL):
+    if not delta:
+        return
+    counters = StatCounter.objects.filter(key=key, day=day)
+    if counters.update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            StatCounter.objects.create(key=key, day=day, value=delta)
+    except IntegrityError:
+        counters.update(value=F('value') + delta)
+
+
+def bump_many(changes, chunk=500):
+    """Прибавляет пачку изменений {(ключ, день): дельта} за пару запросов."""
+    changes = {pair: delta for pair, delta in changes.items() if delta}
+    if not changes:
+        return
+    keys = {key for key, day in changes}
+    days = sorted({day for key, day in changes})
+    with immediate_atomic():
+        existing = {}
+        for offset in range(0, len(days), chunk):
+            for counter in StatCounter.objects.filter(
+                    key__in=keys, day__in=days[offset:offset + chunk]):
+                existing[counter.key, counter.day] = counter
+        updated, created = [], []
+        for (key, day), delta in changes.items():
+            counter = existing.get((key, day))
+            if counter is None:
+                created.append(StatCounter(key=key, day=day, value=delta))
+            else:
+                counter.value += delta
+                updated.append(counter)
+        StatCounter.objects.bulk_update(updated, ['value'], batch_size=chunk)
+        StatCounter.objects.bulk_create(created, batch_size=chunk)
+
+
+def dashboard_stats(today=None):
+    today = today or timezone.localdate()
+    condition = (
+        Q(key__in=(FILMS, HALLS), day=TOTAL)
+        | Q(key=SESSIONS, day=today)
+        | Q(key=FILMS_ENDING, day__gt=TOTAL, day__lt=today)
+    )
+    values = Counter()
+    for key, value in StatCounter.objects.filter(condition).values_list(
+            'key', 'value'):
+        values[key] += value
+    return {
+        'films_count': values[FILMS],
+        'halls_count': values[HALLS],
+        'sessions_today': values[SESSIONS],
+        'active_films': values[FILMS] - values[FILMS_ENDING],
+    }
+
+
+def cashier_stats(today=None):
+    today = today or timezone.localdate()
+    values = dict(StatCounter.objects.filter(
+        key=ORDERS, day__in=(TOTAL, today)
+    ).values_list('day', 'value'))
+    return {
+        'total_orders': values.get(TOTAL, 0),
+        'today_orders': values.get(today, 0),
+    }
+
+
+def move(key, old_day, new_day):
+    if old_day != new_day:
+        bump(key, -1, old_day)
+        bump(key, 1, new_day)
+
+
+def compute_counters(film_model, hall_model, session_model, order_model):
+    counters = Counter()
+    counters[FILMS, TOTAL] = film_model.objects.count()
+    counters[HALLS, TOTAL] = hall_model.objects.count()
+    counters[ORDERS, TOTAL] = order_model.objects.count()
+    counters[ORDERS_CONFIRMED, TOTAL] = order_model.objects.filter(
+        status='confirmed'
+    ).count()
+    counters[ORDERS_CANCELLED, TOTAL] = order_model.objects.filter(
+        status='cancelled'
+    ).count()
+
+    grouped = (
+        (FILMS_ENDING, film_model.objects.values_list('ending')),
+        (SESSIONS, session_model.objects.values_list('date')),
+        (ORDERS, order_model.objects.annotate(
+            day=TruncDate('created_at')
+        ).values_list('day')),
+    )
+    for key, queryset in grouped:
+        for day, value in queryset.annotate(n=Count('id')).order_by():
+            counters[key, day] = value
+    return counters
+
+
+def store_counters(counter_model, counters):
+    counter_model.objects.all().delete()
+    counter_model.objects.bulk_create([
+        counter_model(key=key, day=day, value=value)
+        for (key, day), value in counters.items()
+        if value
+    ])
+
+
+def reconcile():
+    from cashier_panel.models import Order
+    from films.models import Film
+    from .models import Hall, Session
+
+    with transaction.atomic():
+        stored = Counter({
+            (key, day): value
+            for key, day, value in StatCounter.objects.values_list(
+                'key', 'day', 'value'
+            )
+        })
+        actual = compute_counters(Film, Hall, Session, Order)
+        # Удаления не восстановить по таблицам, счётчик только растёт.
+        actual[DELETIONS, TOTAL] = stored[DELETIONS, TOTAL]
+        store_counters(StatCounter, actual)
+
+    return {
+        key: (stored[key], actual[key])
+        for key in set(stored) | set(actual)
+        if stored[key] != actual[key]
+    }
@@ -1,3 +1,397 @@
-from django.test import TestCase
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, time, timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from cinema import cache
+from cinema.sqlite.base import DatabaseWrapper
+from cinema.transactions import immediate_atomic
+from films.models import Film
+from . import stats
+from .models import Hall, Session, StatCounter, closing_at
+from .planner import plan_schedule
+from .scheduling import (MAX_GRID_DAYS, day_slots, free_gaps, insert_sessions,
+                         new_session, slot_grid)
+
+SCHEDULE_QUERY_BUDGET = 5
+
+
+class SessionScheduleQueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(
+            User.objects.create_user('admin', password='admin', is_staff=True)
+        )
+        today = timezone.localdate()
+        self.halls = [
+            Hall.objects.create(number=number, name=f'Зал {number}')
+            for number in range(1, 4)
+        ]
+        self.films = [
+            Film.objects.create(
+                title=f'Фильм {number}', description='', time=time(1, 30),
+                country='', beginning=today,
+                ending=today + timedelta(days=30),
+            )
+            for number in range(3)
+        ]
+        for offset in range(5):
+            for hall, film in zip(self.halls, self.films):
+                Session.objects.create(
+                    film=film, hall=hall,
+                    date=today + timedelta(days=offset),
+                    start_time=time(12, 0),
+                )
+        self.url = reverse('admin_panel:session_schedule')
+        self.params = {
+            'film_id': self.films[0].pk,
+            'hall_id': self.halls[0].pk,
+            'date': today.isoformat(),
+        }
+
+    def test_cold_page_stays_within_budget(self):
+        # django_session, auth_user, затем залы, фильмы и сеансы снимка
+        with self.assertNumQueries(SCHEDULE_QUERY_BUDGET):
+            response = self.client.get(self.url, self.params)
+        self.assertEqual(len(response.context['sessions']), 15)
+        self.assertNotIn('12:00', response.context['available_times'])
+
+    def test_warm_page_reads_snapshot_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, self.params)
+        self.assertContains(response, 'Фильм 2')
+
+    def test_session_change_invalidates_snapshot(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Session.objects.create(
+                film=self.films[0], hall=self.halls[0],
+                date=timezone.localdate() + timedelta(days=6),
+                start_time=time(15, 0),
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['sessions']), 16)
+
+
+class BumpManyTest(TestCase):
+    def test_many_days_cost_a_bounded_number_of_queries(self):
+        today = timezone.localdate()
+        stats.bump(stats.FILMS_ENDING, 5, today)
+        changes = {
+            (stats.FILMS_ENDING, today + timedelta(days=offset)): 2
+            for offset in range(300)
+        }
+        with self.assertNumQueries(5):
+            stats.bump_many(changes)
+        values = dict(StatCounter.objects.filter(
+            key=stats.FILMS_ENDING
+        ).values_list('day', 'value'))
+        self.assertEqual(len(values), 300)
+        self.assertEqual(values[today], 7)
+        self.assertEqual(values[today + timedelta(days=299)], 2)
+
+
+class MidnightConflictTest(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.hall = Hall.objects.create(number=1)
+        self.film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=self.day, ending=self.day,
+        )
+        long_film = Film.objects.create(
+            title='Длинный', description='', time=time(2, 0), country='',
+            beginning=self.day, ending=self.day,
+        )
+        # 22:00 + 2:00 + уборка: занят до 00:30 следующего дня
+        Session.objects.create(film=long_film, hall=self.hall, date=self.day,
+                               start_time=time(22, 0))
+
+    def test_clean_rejects_overlap_past_midnight(self):
+        session = Session(film=self.film, hall=self.hall, date=self.day,
+                          start_time=time(23, 0))
+        with self.assertRaisesMessage(ValidationError, 'пересекается'):
+            session.clean()
+
+    def test_bulk_insert_rejects_overlap_past_midnight(self):
+        created, conflicts = insert_sessions([
+            new_session(self.film, self.hall.pk, self.day, time(23, 0)),
+            new_session(self.film, self.hall.pk, self.day, time(19, 0)),
+            new_session(self.film, self.hall.pk, self.day, time(20, 30)),
+        ])
+        self.assertEqual([session.start_time for session in created],
+                         [time(19, 0)])
+        self.assertEqual(
+            [session.start_time for session, error in conflicts],
+            [time(20, 30), time(23, 0)]
+        )
+
+    def test_slot_grid_has_no_start_after_late_session(self):
+        slots = slot_grid(self.film, [self.hall.pk], [self.day])
+        starts = [timezone.localtime(slot).time()
+                  for slot in slots[self.day][self.hall.pk]]
+        # 20:00 + 1:30 + уборка упирается ровно в сеанс 22:00
+        self.assertEqual(max(starts), time(20, 0))
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class SlotGridTest(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.next_day = self.day + timedelta(days=1)
+        self.halls = [Hall.objects.create(number=number)
+                      for number in range(1, 3)]
+        # 1:30 + уборка: каждый сеанс занимает ровно два часа
+        self.film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=self.day, ending=self.next_day,
+        )
+        Session.objects.create(film=self.film, hall=self.halls[0],
+                               date=self.day, start_time=time(12, 0))
+
+    def starts(self, slots):
+        return [timezone.localtime(slot).time() for slot in slots]
+
+    def test_free_gaps_merge_overlapping_busy_intervals(self):
+        busy = [(at(self.day, 11), at(self.day, 12)),
+                (at(self.day, 11, 30), at(self.day, 13)),
+                (at(self.day, 15), at(self.day, 16))]
+        self.assertEqual(
+            free_gaps(busy, at(self.day, 10), at(self.day, 18)),
+            [(at(self.day, 10), at(self.day, 11)),
+             (at(self.day, 13), at(self.day, 15)),
+             (at(self.day, 16), at(self.day, 18))]
+        )
+
+    def test_day_slots_round_up_to_five_minutes_after_busy_time(self):
+        busy = [(at(self.day, 12), at(self.day, 13, 7))]
+        slots = day_slots(self.day, busy, timedelta(hours=2))
+        self.assertEqual(self.starts(slots), [
+            time(10, 0), time(13, 10), time(15, 10), time(17, 10),
+            time(19, 10), time(21, 10),
+        ])
+
+    def test_grid_covers_halls_and_days_with_one_query(self):
+        hall_ids = [hall.pk for hall in self.halls]
+        with self.assertNumQueries(1):
+            grid = slot_grid(self.film, hall_ids, [self.day, self.next_day])
+        free_day = [time(hour, 0) for hour in range(10, 23, 2)]
+        self.assertEqual(self.starts(grid[self.day][hall_ids[0]]),
+                         [time(10, 0)] + free_day[2:])
+        self.assertEqual(self.starts(grid[self.day][hall_ids[1]]), free_day)
+        for hall_id in hall_ids:
+            self.assertEqual(self.starts(grid[self.next_day][hall_id]),
+                             free_day)
+
+    def test_view_returns_batched_times(self):
+        self.client.force_login(
+            User.objects.create_user('admin', password='admin', is_staff=True)
+        )
+        hall_ids = [hall.pk for hall in self.halls]
+        response = self.client.get(reverse('admin_panel:slot_grid'), {
+            'film_id': self.film.pk, 'hall_id': hall_ids,
+            'date_from': self.day.isoformat(), 'days': 2,
+        })
+        data = response.json()
+        self.assertEqual(data['halls'], hall_ids)
+        self.assertEqual(data['dates'],
+                         [self.day.isoformat(), self.next_day.isoformat()])
+        self.assertEqual(
+            data['times'][self.day.isoformat()][str(hall_ids[0])],
+            ['10:00', '14:00', '16:00', '18:00', '20:00', '22:00']
+        )
+
+        response = self.client.get(reverse('admin_panel:slot_grid'), {
+            'film_id': self.film.pk, 'hall_id': 'x',
+            'date_from': 'вчера', 'days': 1000,
+        })
+        data = response.json()
+        self.assertEqual(sorted(data['halls']), sorted(hall_ids))
+        self.assertEqual(len(data['dates']), MAX_GRID_DAYS)
+        self.assertEqual(data['dates'][0], timezone.localdate().isoformat())
+
+
+class PlanScheduleTest(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.days = [self.day, self.day + timedelta(days=1)]
+        self.halls = [Hall.objects.create(number=number)
+                      for number in range(1, 3)]
+        self.films = [
+            Film.objects.create(
+                title=f'Фильм {number}', description='', time=duration,
+                country='', beginning=self.day, ending=self.days[-1],
+            )
+            for number, duration in enumerate(
+                [time(1, 30), time(2, 10), time(0, 50)]
+            )
+        ]
+        Session.objects.create(film=self.films[1], hall=self.halls[0],
+                               date=self.day, start_time=time(15, 0))
+
+    def plan(self, weights=None):
+        return plan_schedule(self.films, [hall.pk for hall in self.halls],
+                             self.days, weights)
+
+    def test_sessions_never_overlap_and_stay_within_hall_hours(self):
+        plan = self.plan()
+        self.assertTrue(plan.sessions)
+        halls = {}
+        for session in Session.objects.all():
+            halls.setdefault(session.hall_id, []).append(
+                (session.starts_at, session.ends_at)
+            )
+        for session in plan.sessions:
+            self.assertTrue(
+                time(10, 0) <= session.start_time <= time(23, 0)
+            )
+            self.assertLessEqual(session.ends_at, closing_at(session.date))
+            halls.setdefault(session.hall_id, []).append(
+                (session.starts_at, session.ends_at)
+            )
+        for intervals in halls.values():
+            intervals.sort()
+            for (_, previous_end), (next_start, _) in zip(intervals,
+                                                          intervals[1:]):
+                self.assertLessEqual(previous_end, next_start)
+
+        created, conflicts = insert_sessions(plan.sessions)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(len(created), len(plan.sessions))
+
+    def test_utilization_counts_existing_and_planned_time(self):
+        plan = self.plan()
+        hall_days = len(self.halls) * len(self.days)
+        self.assertEqual(plan.capacity, hall_days * timedelta(hours=15))
+        self.assertGreater(plan.utilization, 0.9)
+        self.assertLessEqual(plan.utilization, 1)
+
+    def test_zero_weight_drops_film(self):
+        plan = self.plan({self.films[2].pk: 0})
+        self.assertNotIn(self.films[2].pk, plan.shows)
+        self.assertEqual(
+            {session.film_id for session in plan.sessions},
+            {self.films[0].pk, self.films[1].pk}
+        )
+
+
+class RecurringSessionTest(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_user('admin', password='admin', is_staff=True)
+        )
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.halls = [Hall.objects.create(number=number)
+                      for number in range(1, 3)]
+        self.film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=self.day, ending=self.day + timedelta(days=30),
+        )
+        self.busy_day = self.day + timedelta(days=1)
+        Session.objects.create(film=self.film, hall=self.halls[0],
+                               date=self.busy_day, start_time=time(19, 0))
+
+    def test_conflicts_are_reported_per_occurrence(self):
+        skipped_day = self.day + timedelta(days=2)
+        response = self.client.post(reverse('admin_panel:session_recurring'), {
+            'film': self.film.pk,
+            'halls': [hall.pk for hall in self.halls],
+            'start_time': '19:30',
+            'date_from': self.day.isoformat(),
+            'date_to': (self.day + timedelta(days=6)).isoformat(),
+            'weekdays': [weekday for weekday in range(7)
+                         if weekday != skipped_day.weekday()],
+        })
+        self.assertEqual(len(response.context['created']), 11)
+        conflicts = response.context['conflicts']
+        self.assertEqual(
+            [(conflict['date'], conflict['hall']) for conflict in conflicts],
+            [(self.busy_day, self.halls[0])]
+        )
+        self.assertIn('Пересекается с существующим сеансом',
+                      conflicts[0]['error'])
+        self.assertTrue(Session.objects.filter(
+            hall=self.halls[1], date=self.busy_day, start_time=time(19, 30)
+        ).exists())
+        self.assertFalse(Session.objects.filter(date=skipped_day).exists())
+
+
+def pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    return cursor.fetchone()[0]
+
+
+class ProductionBackendTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cinema.sqlite3')
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict, 'ENGINE': 'cinema.sqlite',
+            'NAME': self.path, 'OPTIONS': settings.SQLITE_PRODUCTION_OPTIONS,
+        })
+        self.addCleanup(self.wrapper.close)
+
+    def test_connection_applies_pragmas(self):
+        with self.wrapper.cursor() as cursor:
+            self.assertEqual(pragma(cursor, 'journal_mode'), 'wal')
+            self.assertEqual(pragma(cursor, 'busy_timeout'), 20000)
+            # NORMAL = 1, MEMORY = 2
+            self.assertEqual(pragma(cursor, 'synchronous'), 1)
+            self.assertEqual(pragma(cursor, 'temp_store'), 2)
+            self.assertEqual(pragma(cursor, 'cache_size'), -64 * 1024)
+
+    def test_begin_immediate_takes_write_lock(self):
+        self.wrapper.ensure_connection()
+        self.wrapper.begin_immediate = True
+        self.wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
+        self.wrapper.connection.rollback()
+        other.execute('BEGIN IMMEDIATE')
+        other.rollback()
+
+
+class ImmediateAtomicTest(TransactionTestCase):
+    def test_rolls_back_like_atomic(self):
+        with self.assertRaises(ValueError):
+            with immediate_atomic():
+                Hall.objects.create(number=1)
+                raise ValueError
+        self.assertFalse(Hall.objects.exists())
+
+    @skipUnless(settings.DATABASE_PROFILE == 'production',
+                'нужен CINEMA_DB_PROFILE=production')
+    def test_only_outermost_block_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with immediate_atomic():
+                with immediate_atomic():
+                    Hall.objects.create(number=1)
+            with transaction.atomic():
+                Hall.objects.create(number=2)
+        begins = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+
+    @skipUnless(settings.DATABASE_PROFILE == 'production',
+                'нужен CINEMA_DB_PROFILE=production')
+    def test_default_connection_applies_pragmas(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(pragma(cursor, 'busy_timeout'), 20000)
+            self.assertEqual(pragma(cursor, 'synchronous'), 1)
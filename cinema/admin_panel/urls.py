@@ -8,6 +8,8 @@ urlpatterns = [
     path('login/', views.AdminLoginView.as_view(), name='login'),
     path('logout/', views.AdminLogoutView.as_view(), name='logout'),
     path('dashboard/', views.DashboardView.as_view(), name='admin_dashboard'),
+    path('cache/metrics/',
+         views.CacheMetricsView.as_view(), name='cache_metrics'),
 
     path('films/', views.FilmListView.as_view(), name='film_list'),
     path('films/create/', views.FilmCreateView.as_view(), name='film_create'),
@@ -27,6 +29,10 @@ urlpatterns = [
          views.SessionScheduleView.as_view(), name='session_schedule'),
     path('sessions/get-times/',
          views.GetTimesView.as_view(), name='get_times'),
+    path('sessions/recurring/',
+         views.RecurringSessionView.as_view(), name='session_recurring'),
+    path('sessions/slots/',
+         views.SlotGridView.as_view(), name='slot_grid'),
     path('sessions/delete/<int:pk>/',
          views.SessionDeleteView.as_view(), name='session_delete'),
 ]
@@ -1,15 +1,20 @@
 from .models import Hall, Session
-from films.models import Film
-from .forms import FilmForm, HallForm, SessionForm
+from films.models import CATALOG_ORDER, Film
+from cinema import cache
+from cinema.pagination import keyset_page
+from .forms import FilmForm, HallForm, RecurringSessionForm, SessionForm
+from .scheduling import (MAX_GRID_DAYS, expand_recurrence, format_slots,
+                         insert_sessions, schedule_snapshot, slot_grid)
+from .stats import dashboard_stats
 from django.views.generic import (ListView, CreateView, UpdateView,
                                   DeleteView, TemplateView, View, FormView)
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.urls import reverse_lazy
 from django.http import JsonResponse
 from django.utils import timezone
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 
 
 class AdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -50,41 +55,44 @@ class DashboardView(AdminRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['stats'] = {
-            'films_count': Film.objects.count(),
-            'halls_count': Hall.objects.count(),
-            'sessions_today': Session.objects.filter(date=timezone.now().date()).count(),
-            'active_films': Film.objects.filter(ending__gte=timezone.now().date()).count()
-        }
+        context['stats'] = cache.namespace('dashboard').get_or_set(
+            'admin', dashboard_stats
+        )
         context['film_list'] = Film.objects.all()[:5]
         return context
 
 
+class CacheMetricsView(AdminRequiredMixin, View):
+    def get(self, request):
+        return JsonResponse({'namespaces': cache.metrics()})
+
+
 class FilmListView(AdminRequiredMixin, ListView):
     model = Film
     template_name = 'admin_panel/film_list.html'
     context_object_name = 'films'
 
     def get_queryset(self):
-        return Film.objects.all().order_by('-ending', 'title')
+        self.archive = self.request.GET.get('archive') == '1'
+        today = timezone.now().date()
+        if self.archive:
+            films = Film.objects.filter(ending__lt=today)
+        else:
+            films = Film.objects.filter(ending__gte=today)
+        films, self.next_cursor = keyset_page(
+            films, CATALOG_ORDER, self.request.GET.get('after')
+        )
+        return films
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
-
-        active_films = []
-        archive_films = []
-
-        for film in context['films']:
-            if film.ending >= today:
-                active_films.append(film)
-            else:
-                archive_films.append(film)
-
-        context['active_films'] = active_films
-        context['archive_films'] = archive_films
-        context['today'] = today
-
+        context.update({
+            'archive': self.archive,
+            'active_films': [] if self.archive else context['films'],
+            'archive_films': context['films'] if self.archive else [],
+            'next_cursor': self.next_cursor,
+            'today': timezone.now().date(),
+        })
         return context
 
 
@@ -150,29 +158,31 @@ class SessionScheduleView(AdminRequiredMixin, FormView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        snapshot = schedule_snapshot()
         context.update({
-            'halls': Hall.objects.all(),
-            'films': Film.objects.filter(ending__gte=timezone.now().date()),
-            'sessions': Session.objects.filter(
-                date__range=[timezone.now().date(), timezone.now().date() + timedelta(days=14)]
-            ),
-            'today': timezone.now().date()
+            'halls': snapshot.halls,
+            'films': snapshot.films,
+            'sessions': snapshot.sessions,
+            'today': snapshot.date_from,
         })
 
-        film_id = self.request.GET.get('film_id')
-        hall_id = self.request.GET.get('hall_id')
-        date = self.request.GET.get('date')
-
-        if film_id and hall_id and date:
+        film = snapshot.film(self.request.GET.get('film_id', ''))
+        hall = snapshot.hall(self.request.GET.get('hall_id', ''))
+        try:
+            selected_date = datetime.strptime(
+                self.request.GET.get('date', ''), '%Y-%m-%d'
+            ).date()
+        except ValueError:
+            selected_date = None
+
+        if film and hall and selected_date:
+            busy = snapshot.busy() if snapshot.covers(selected_date) else None
+            grid = slot_grid(film, [hall.pk], [selected_date], busy)
             context.update({
-                'selected_film': Film.objects.get(pk=film_id),
-                'selected_hall': Hall.objects.get(pk=hall_id),
-                'selected_date': datetime.strptime(date, '%Y-%m-%d').date(),
-                'available_times': GetTimesView().get_times(
-                    Film.objects.get(pk=film_id),
-                    Hall.objects.get(pk=hall_id),
-                    datetime.strptime(date, '%Y-%m-%d').date()
-                )
+                'selected_film': film,
+                'selected_hall': hall,
+                'selected_date': selected_date,
+                'available_times': format_slots(grid[selected_date][hall.pk]),
             })
         return context
 
@@ -197,34 +207,78 @@ class GetTimesView(AdminRequiredMixin, View):
         return JsonResponse({'times': times})
 
     def get_times(self, film, hall, selected_date):
-        existing_sessions = Session.objects.filter(hall=hall,
-                                                   date=selected_date)
-        times = []
-        current_time = time(10, 0)
-
-        while current_time <= time(22, 0):
-            film_minutes = film.time.hour * 60 + film.time.minute
-            current_minutes = current_time.hour * 60 + current_time.minute
-            end_minutes = current_minutes + film_minutes
-            proposed_end = time(end_minutes // 60, end_minutes % 60)
-
-            if proposed_end > time(23, 0):
-                break
-
-            conflict = any(
-                current_time < session.end_time and proposed_end > session.start_time
-                for session in existing_sessions
-            )
-
-            if not conflict:
-                times.append(current_time.strftime('%H:%M'))
-
-            next_minutes = end_minutes + 30
-            if next_minutes >= 23 * 60:
-                break
-            current_time = time(next_minutes // 60, next_minutes % 60)
-
-        return times
+        grid = slot_grid(film, [hall.pk], [selected_date])
+        return format_slots(grid[selected_date][hall.pk])
+
+
+class SlotGridView(AdminRequiredMixin, View):
+    def get(self, request):
+        film_id = request.GET.get('film_id')
+        if not film_id:
+            return JsonResponse({'times': {}})
+
+        film = get_object_or_404(Film, pk=film_id)
+        hall_ids = [int(pk) for pk in request.GET.getlist('hall_id')
+                    if pk.isdigit()]
+        if not hall_ids:
+            hall_ids = list(Hall.objects.values_list('pk', flat=True))
+        try:
+            date_from = datetime.strptime(
+                request.GET.get('date_from', ''), '%Y-%m-%d'
+            ).date()
+        except ValueError:
+            date_from = timezone.localdate()
+        try:
+            days = int(request.GET.get('days', 14))
+        except ValueError:
+            days = 14
+        days = [date_from + timedelta(days=offset)
+                for offset in range(min(max(days, 1), MAX_GRID_DAYS))]
+
+        grid = slot_grid(film, hall_ids, days)
+        return JsonResponse({
+            'film': film.pk,
+            'halls': hall_ids,
+            'dates': [day.isoformat() for day in days],
+            'times': {
+                day.isoformat(): {
+                    str(hall_id): format_slots(slots)
+                    for hall_id, slots in halls.items()
+                }
+                for day, halls in grid.items()
+            },
+        })
+
+
+class RecurringSessionView(AdminRequiredMixin, FormView):
+    template_name = 'admin_panel/session_recurring.html'
+    form_class = RecurringSessionForm
+
+    def get_initial(self):
+        today = timezone.now().date()
+        return {'date_from': today, 'date_to': today + timedelta(days=13)}
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        sessions = expand_recurrence(
+            data['film'], [hall.pk for hall in data['halls']],
+            data['start_time'], data['date_from'], data['date_to'],
+            set(data['weekdays'])
+        )
+        created, conflicts = insert_sessions(sessions)
+        halls = {hall.pk: hall for hall in data['halls']}
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            created=created,
+            conflicts=[
+                {'date': session.date, 'hall': halls[session.hall_id],
+                 'error': error}
+                for session, error in sorted(
+                    conflicts, key=lambda item: (item[0].date,
+                                                 item[0].hall_id)
+                )
+            ],
+        ))
 
 
 class SessionDeleteView(AdminRequiredMixin, DeleteView):
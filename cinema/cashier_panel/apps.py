@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CashierPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cashier_panel'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Order
+from .services import MAX_CART_SEATS
 
 
 class BookingForm(forms.ModelForm):
@@ -18,3 +19,24 @@ class BookingForm(forms.ModelForm):
                 'placeholder': 'Введите ваше имя'
             }),
         }
+
+
+class CartForm(forms.Form):
+    name = forms.CharField(label='Имя покупателя', max_length=10)
+    seats = forms.MultipleChoiceField(label='Места')
+
+    def __init__(self, *args, hall, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['seats'].choices = [
+            (f'{row}-{place}', f'Ряд {row}, место {place}')
+            for row in range(1, hall.count_rows + 1)
+            for place in range(1, hall.count_places + 1)
+        ]
+
+    def clean_seats(self):
+        seats = self.cleaned_data['seats']
+        if len(seats) > MAX_CART_SEATS:
+            raise forms.ValidationError(
+                f'В одном заказе не больше {MAX_CART_SEATS} мест'
+            )
+        return [tuple(map(int, seat.split('-'))) for seat in seats]
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import re
+import threading
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import transaction
+
+BOOKED = 'booked'
+CANCELLED = 'cancelled'
+HELD = 'held'
+RELEASED = 'released'
+
+KEEPALIVE_SECONDS = 15
+QUEUE_SIZE = 256
+EVENTS_PATH = re.compile(
+    r'^/cashier_panel/session/(?P<session_id>\d+)/events/$'
+)
+
+
+class Subscription:
+    def __init__(self, session_id, loop):
+        self.session_id = session_id
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflow = False
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflow = True
+
+
+class SeatEventBroker:
+    """Рассылка изменений мест подписчикам внутри одного процесса.
+
+    События не выходят за пределы процесса, поэтому ASGI-приложение
+    должно работать одним процессом: кассы получают только то, что
+    продано или снято в нём же. Просроченные удержания поток снимает
+    сам (release_expired), команда release_holds лишь дочищает базу.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id):
+        subscription = Subscription(session_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[session_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.session_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.session_id]
+
+    def subscribers_count(self, session_id=None):
+        with self._lock:
+            if session_id is not None:
+                return len(self._subscribers.get(session_id, ()))
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, session_id, event):
+        message = json.dumps(event, separators=(',', ':'))
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(
+                subscription.push, message
+            )
+
+
+broker = SeatEventBroker()
+
+
+def publish_seats(session_id, state, seats, **extra):
+    if not seats:
+        return
+    event = {'state': state, 'seats': [list(seat) for seat in seats]}
+    event.update(extra)
+    transaction.on_commit(lambda: broker.publish(session_id, event))
+
+
+def release_expired(session_id):
+    from .services import release_expired_holds
+    return release_expired_holds(session_id=session_id)
+
+
+def session_user_id(session_key):
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(session_key).get(SESSION_KEY)
+
+
+async def authenticated(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', ()):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return False
+    return await sync_to_async(session_user_id)(morsel.value) is not None
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def seat_events(scope, receive, send, session_id):
+    if not await authenticated(scope):
+        await send({'type': 'http.response.start', 'status': 403,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Forbidden'})
+        return
+
+    subscription = broker.subscribe(session_id)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n',
+                    'more_body': True})
+
+        while True:
+            message = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnect}, timeout=KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                message.cancel()
+                break
+            if message in done:
+                body = f'event: seats\ndata: {message.result()}\n\n'
+            else:
+                message.cancel()
+                # Освобождённые места придут следующим сообщением очереди
+                await sync_to_async(release_expired)(session_id)
+                body = ': keepalive\n\n'
+            if subscription.overflow:
+                body = 'event: reset\ndata: {}\n\n'
+            await send({'type': 'http.response.body',
+                        'body': body.encode(), 'more_body': True})
+            if subscription.overflow:
+                break
+    finally:
+        broker.unsubscribe(subscription)
+        disconnect.cancel()
+
+
+def route_seat_events(application):
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                await seat_events(scope, receive, send,
+                                  int(match['session_id']))
+                return
+        await application(scope, receive, send)
+
+    return router
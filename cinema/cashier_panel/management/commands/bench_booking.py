@@ -0,0 +1,59 @@
+from datetime import time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from admin_panel.models import Hall, Session
+from cinema.benchmark import scratch_database
+from films.models import Film
+from cashier_panel.models import Booking
+from cashier_panel.stress import booking_stress
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест конкурентной продажи мест на временной базе'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--rows', type=int, default=10)
+        parser.add_argument('--places', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            session = self.create_session(options['rows'], options['places'])
+            seats = [
+                (row, place)
+                for row in range(1, options['rows'] + 1)
+                for place in range(1, options['places'] + 1)
+            ]
+            stats = booking_stress(session, seats, workers=options['workers'])
+
+            doubles = Booking.objects.values('row', 'place').annotate(
+                n=Count('id')
+            ).filter(n__gt=1).count()
+
+        self.stdout.write(
+            f"Потоков: {options['workers']}, мест: {len(seats)}\n"
+            f"Продано: {stats['sold']}, отказов: {stats['taken']}, "
+            f"повторов из-за блокировок: {stats['retries']}, "
+            f"не дождались блокировки: {stats['failed']}\n"
+            f"Время: {stats['elapsed']:.3f} с, "
+            f"{stats['per_second']:.1f} продаж/с"
+        )
+        if doubles or stats['sold'] != len(seats):
+            raise CommandError(
+                f'Двойных продаж: {doubles}, продано {stats["sold"]} '
+                f'из {len(seats)}'
+            )
+
+    def create_session(self, rows, places):
+        today = timezone.now().date()
+        film = Film.objects.create(
+            title='Бенчмарк', description='', time=time(1, 30),
+            country='', beginning=today, ending=today + timedelta(days=1)
+        )
+        hall = Hall.objects.create(number=1, count_rows=rows,
+                                   count_places=places)
+        return Session.objects.create(film=film, hall=hall, date=today,
+                                      start_time=time(12, 0))
@@ -0,0 +1,136 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = '''
+    CREATE TABLE booking (
+        id INTEGER PRIMARY KEY,
+        session_id INTEGER NOT NULL,
+        row INTEGER NOT NULL,
+        place INTEGER NOT NULL,
+        UNIQUE (session_id, row, place)
+    )
+'''
+
+
+def profiles():
+    production = settings.SQLITE_PRODUCTION_OPTIONS
+    return {
+        'как было': {'timeout': 5, 'pragmas': {}, 'begin': 'BEGIN'},
+        'production': {'timeout': production['timeout'],
+                       'pragmas': production['pragmas'],
+                       'begin': 'BEGIN IMMEDIATE'},
+    }
+
+
+def connect(path, profile):
+    connection = sqlite3.connect(path, timeout=profile['timeout'],
+                                 isolation_level=None,
+                                 check_same_thread=False)
+    for name, value in profile['pragmas'].items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+class Workload:
+    def __init__(self, path, profile, seconds, sessions):
+        self.path = path
+        self.profile = profile
+        self.deadline = time.monotonic() + seconds
+        self.sessions = sessions
+        self.lock = threading.Lock()
+        self.reads = self.writes = self.errors = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def writer(self, seed):
+        rnd = random.Random(seed)
+        connection = connect(self.path, self.profile)
+        while time.monotonic() < self.deadline:
+            session = rnd.randrange(self.sessions)
+            try:
+                # Как book_seats: проверить места, затем записать бронь.
+                connection.execute(self.profile['begin'])
+                connection.execute(
+                    'SELECT row, place FROM booking WHERE session_id = ?',
+                    (session,)
+                ).fetchall()
+                connection.execute(
+                    'INSERT OR IGNORE INTO booking (session_id, row, place) '
+                    'VALUES (?, ?, ?)',
+                    (session, rnd.randint(1, 20), rnd.randint(1, 30))
+                )
+                connection.execute('COMMIT')
+                self.count('writes')
+            except sqlite3.OperationalError:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                self.count('errors')
+        connection.close()
+
+    def reader(self, seed):
+        rnd = random.Random(seed)
+        connection = connect(self.path, self.profile)
+        while time.monotonic() < self.deadline:
+            try:
+                connection.execute(
+                    'SELECT row, place FROM booking WHERE session_id = ?',
+                    (rnd.randrange(self.sessions),)
+                ).fetchall()
+                self.count('reads')
+            except sqlite3.OperationalError:
+                self.count('errors')
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite с настройками '
+            'по умолчанию и с профилем production')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--sessions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        for name, profile in profiles().items():
+            fd, path = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(fd)
+            try:
+                connection = connect(path, profile)
+                connection.execute(SCHEMA)
+                connection.close()
+
+                workload = Workload(path, profile, options['seconds'],
+                                    options['sessions'])
+                threads = [
+                    threading.Thread(target=workload.writer, args=(number,))
+                    for number in range(options['writers'])
+                ] + [
+                    threading.Thread(target=workload.reader, args=(number,))
+                    for number in range(options['readers'])
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                seconds = options['seconds']
+                self.stdout.write(
+                    f'{name:<12} чтений/с: {workload.reads / seconds:8.0f}, '
+                    f'записей/с: {workload.writes / seconds:7.0f}, '
+                    f'ошибок блокировки: {workload.errors}'
+                )
+            finally:
+                for suffix in ('', '-wal', '-shm', '-journal'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cinema.benchmark import scratch_database
+from cashier_panel.models import Order, OrderSearchToken
+from cashier_panel.search import build_tokens, search_orders
+
+NAMES = ('Иван', 'Пётр', 'Анна', 'Мария', 'Олег', 'Ольга', 'Сергей',
+         'Елена', 'Дмитрий', 'Алиса', 'Никита', 'Вера')
+TITLES = ('Астрал', 'Стич', 'Человек-слон', 'По-братски', 'Умри моя любовь',
+          'Письмо Деду Морозу', 'Иллюзия обмана 3', 'Два мира',
+          'Стометровка', 'Папины дочки')
+QUERIES = ('астр', 'анна', 'T0500000', 'иллюзия обм', 'мария папины', 'zzz')
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает индексный поиск заказов с title__iregex'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            started = time.perf_counter()
+            self.fill(options['orders'])
+            self.stdout.write(
+                f'Заказов: {options["orders"]}, заполнение '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            for query in QUERIES:
+                indexed = self.measure(
+                    lambda: search_orders(query), options['repeat']
+                )
+                regex = self.measure(
+                    lambda: list(Order.objects.filter(
+                        title__iregex=query
+                    )[:20]), 1
+                )
+                self.stdout.write(
+                    f'{query!r:<16} индекс {indexed * 1000:8.2f} мс, '
+                    f'iregex {regex * 1000:9.2f} мс'
+                )
+
+    def measure(self, function, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat
+
+    def fill(self, total, batch=5000):
+        rnd = random.Random(0)
+        now = timezone.now()
+        for start in range(1, total + 1, batch):
+            orders = [
+                Order(id=number, title=rnd.choice(TITLES),
+                      name=rnd.choice(NAMES), slug=f'T{number:07d}',
+                      time=now, hall='Зал', price=500, row=1, place=1,
+                      session_id=1)
+                for number in range(start, min(start + batch, total + 1))
+            ]
+            Order.objects.bulk_create(orders)
+            OrderSearchToken.objects.bulk_create([
+                token
+                for order in orders
+                for token in build_tokens(OrderSearchToken, order)
+            ])
@@ -0,0 +1,58 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from cashier_panel.seatmap import BOOKED, SeatMap, find_best_seats
+
+
+def occupancy_patterns(rows, places, seed=0):
+    rnd = random.Random(seed)
+    total = rows * places
+
+    def random_fill(share):
+        return bytearray(
+            BOOKED if rnd.random() < share else 0 for _ in range(total)
+        )
+
+    center = bytearray(total)
+    for row in range(rows // 3, rows):
+        for place in range(places // 4, places - places // 4):
+            center[row * places + place] = BOOKED
+
+    checkerboard = bytearray(
+        BOOKED if (index // places + index % places) % 2 else 0
+        for index in range(total)
+    )
+
+    return {
+        'пустой зал': bytearray(total),
+        'занято 50%': random_fill(0.5),
+        'занято 90%': random_fill(0.9),
+        'занят центр': center,
+        'шахматка': checkerboard,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк подбора N мест подряд на синтетической занятости'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        for rows, places in ((10, 10), (20, 30), (40, 60)):
+            for name, states in occupancy_patterns(rows, places).items():
+                seat_map = SeatMap(rows, places, states)
+                for count in (2, 5, 8):
+                    seconds = timeit.timeit(
+                        lambda: find_best_seats(seat_map, count),
+                        number=number
+                    )
+                    found = find_best_seats(seat_map, count)
+                    self.stdout.write(
+                        f'{rows}x{places:<3} {name:<12} N={count}: '
+                        f'{seconds / number * 1e6:8.1f} мкс '
+                        f'{"ряд %d" % found[0][0] if found else "нет мест"}'
+                    )
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cinema.benchmark import scratch_database
+from cashier_panel.models import Order
+from cashier_panel.tickets import TicketNumberAllocator
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает count()+1 и блочный счётчик номеров билетов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--allocations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        allocations = options['allocations']
+        with scratch_database():
+            self.fill_orders(options['orders'])
+
+            started = time.perf_counter()
+            for _ in range(allocations):
+                f"T{Order.objects.count() + 1:06d}"
+            count_seconds = time.perf_counter() - started
+
+            allocator = TicketNumberAllocator()
+            started = time.perf_counter()
+            for _ in range(allocations):
+                f"T{allocator.allocate():06d}"
+            allocator_seconds = time.perf_counter() - started
+            allocator.reset()
+
+        for name, seconds in (('count()+1', count_seconds),
+                              ('блочный счётчик', allocator_seconds)):
+            self.stdout.write(
+                f'{name:<16} {seconds / allocations * 1e6:10.1f} мкс на номер'
+            )
+        self.stdout.write(
+            f'Заказов в таблице: {options["orders"]}, '
+            f'ускорение: {count_seconds / allocator_seconds:.0f}x'
+        )
+
+    def fill_orders(self, total, batch=5000):
+        now = timezone.now()
+        for start in range(0, total, batch):
+            Order.objects.bulk_create([
+                Order(title='Фильм', name='Гость', slug=f'B{number:07d}',
+                      time=now, hall='Зал', price=500, row=1, place=1,
+                      session_id=1)
+                for number in range(start, min(start + batch, total))
+            ])
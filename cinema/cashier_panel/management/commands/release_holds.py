@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cashier_panel.services import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Снимает просроченные удержания мест'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Повторять каждые N секунд (по умолчанию один проход)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            released = release_expired_holds()
+            if released:
+                self.stdout.write(f'Снято удержаний: {released}')
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_free_bookings(apps, schema_editor):
+    Booking = apps.get_model('cashier_panel', 'Booking')
+    Booking.objects.filter(is_booked=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cashier_panel', '0003_alter_order_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='cashier_panel.order'),
+        ),
+        migrations.RunPython(delete_free_bookings, migrations.RunPython.noop),
+    ]
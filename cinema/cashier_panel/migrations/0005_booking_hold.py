@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cashier_panel', '0004_compact_bookings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='held_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кем удерживается'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='held_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Удерживается до'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+def seed_order_sequence(apps, schema_editor):
+    Order = apps.get_model('cashier_panel', 'Order')
+    TicketSequence = apps.get_model('cashier_panel', 'TicketSequence')
+    last = 0
+    for slug in Order.objects.values_list('slug', flat=True).iterator():
+        number = slug.lstrip('T')
+        if number.isdigit():
+            last = max(last, int(number))
+    TicketSequence.objects.create(name='order', next_value=last + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cashier_panel', '0005_booking_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSequence',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Название')),
+                ('next_value', models.BigIntegerField(default=1, verbose_name='Следующий номер')),
+            ],
+            options={
+                'verbose_name': 'счётчик номеров',
+                'verbose_name_plural': 'Счётчики номеров',
+            },
+        ),
+        migrations.RunPython(seed_order_sequence, migrations.RunPython.noop),
+    ]
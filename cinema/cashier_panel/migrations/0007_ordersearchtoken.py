@@ -0,0 +1,79 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:44
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия разбора на слова на момент миграции: индекс не должен зависеть
+# от того, как cashier_panel.search устроен сейчас.
+WORD = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+SLUG_WEIGHT = 3
+NAME_WEIGHT = 2
+TITLE_WEIGHT = 1
+
+
+def tokenize(text):
+    return [
+        word[:MAX_TOKEN_LENGTH]
+        for word in WORD.findall((text or '').lower().replace('ё', 'е'))
+    ]
+
+
+def order_tokens(order):
+    weights = {}
+    slug = order.slug.lower()
+    number = slug.lstrip('t').lstrip('0')
+    fields = (
+        (tokenize(order.title), TITLE_WEIGHT),
+        (tokenize(order.name), NAME_WEIGHT),
+        ([slug, number] if number else [slug], SLUG_WEIGHT),
+    )
+    for tokens, weight in fields:
+        for token in tokens:
+            weights[token] = max(weights.get(token, 0), weight)
+    return weights
+
+
+def index_orders(apps, schema_editor):
+    Order = apps.get_model('cashier_panel', 'Order')
+    OrderSearchToken = apps.get_model('cashier_panel', 'OrderSearchToken')
+    tokens = []
+    for order in Order.objects.iterator():
+        tokens.extend(
+            OrderSearchToken(order_id=order.pk, token=token, weight=weight)
+            for token, weight in order_tokens(order).items()
+        )
+        if len(tokens) >= 5000:
+            OrderSearchToken.objects.bulk_create(tokens)
+            tokens = []
+    OrderSearchToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cashier_panel', '0006_ticketsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Вес')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='cashier_panel.order')),
+            ],
+            options={
+                'verbose_name': 'слово поиска заказов',
+                'verbose_name_plural': 'Слова поиска заказов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ordersearchtoken',
+            index=models.Index(fields=['token', 'weight', 'order'], name='cashier_pan_token_ffab3d_idx'),
+        ),
+        migrations.RunPython(index_orders, migrations.RunPython.noop),
+    ]
@@ -30,16 +30,46 @@ class Order(models.Model):
         verbose_name_plural = 'Заказы'
         ordering = ('-created_at',)
 
-    def save(self, *args, **kwargs):
+    def assign_ticket_number(self):
         if not self.slug:
-            count = Order.objects.count()
-            self.slug = f"T{count + 1:06d}"
+            from .tickets import allocate_ticket_number
+            self.slug = f"T{allocate_ticket_number():06d}"
+
+    def save(self, *args, **kwargs):
+        self.assign_ticket_number()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} - {self.name}"
 
 
+class TicketSequence(models.Model):
+    name = models.CharField('Название', max_length=32, primary_key=True)
+    next_value = models.BigIntegerField('Следующий номер', default=1)
+
+    class Meta:
+        verbose_name = 'счётчик номеров'
+        verbose_name_plural = 'Счётчики номеров'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class OrderSearchToken(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE,
+                              related_name='search_tokens')
+    token = models.CharField('Слово', max_length=64)
+    weight = models.PositiveSmallIntegerField('Вес', default=1)
+
+    class Meta:
+        verbose_name = 'слово поиска заказов'
+        verbose_name_plural = 'Слова поиска заказов'
+        indexes = [models.Index(fields=['token', 'weight', 'order'])]
+
+    def __str__(self):
+        return self.token
+
+
 class Booking(models.Model):
     session_id = models.IntegerField('ID сеанса')
     row = models.IntegerField('Ряд')
@@ -47,6 +77,11 @@ class Booking(models.Model):
     is_booked = models.BooleanField('Забронировано', default=False)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True,
                               blank=True, related_name='bookings')
+    held_until = models.DateTimeField('Удерживается до', null=True,
+                                      blank=True, db_index=True)
+    held_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,
+                                blank=True, related_name='+',
+                                verbose_name='Кем удерживается')
 
     class Meta:
         verbose_name = 'бронь'
@@ -0,0 +1,52 @@
+from cinema.search import load_ranked, query_terms, ranked_hits, tokenize
+from .models import Order, OrderSearchToken
+
+SLUG_WEIGHT = 3
+NAME_WEIGHT = 2
+TITLE_WEIGHT = 1
+PAGE_SIZE = 20
+
+
+def order_tokens(order):
+    weights = {}
+    slug = order.slug.lower()
+    number = slug.lstrip('t').lstrip('0')
+    fields = (
+        (tokenize(order.title), TITLE_WEIGHT),
+        (tokenize(order.name), NAME_WEIGHT),
+        ([slug, number] if number else [slug], SLUG_WEIGHT),
+    )
+    for tokens, weight in fields:
+        for token in tokens:
+            weights[token] = max(weights.get(token, 0), weight)
+    return weights
+
+
+def build_tokens(token_model, order):
+    return [
+        token_model(order_id=order.pk, token=token, weight=weight)
+        for token, weight in order_tokens(order).items()
+    ]
+
+
+def index_order(order):
+    OrderSearchToken.objects.filter(order=order).delete()
+    OrderSearchToken.objects.bulk_create(
+        build_tokens(OrderSearchToken, order)
+    )
+
+
+def search_orders(query, after=None, limit=PAGE_SIZE):
+    """Ищет заказы по префиксам слов, все слова запроса обязательны.
+
+    Результаты упорядочены по сумме весов совпавших слов (номер билета,
+    затем имя, затем фильм) и по убыванию id; after — курсор вида
+    «вес:id» с последней строки предыдущей страницы.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], None
+    hits, next_cursor = ranked_hits(
+        OrderSearchToken.objects.all(), 'order', terms, after, limit
+    )
+    return load_ranked(Order.objects.all(), hits), next_cursor
@@ -0,0 +1,138 @@
+import re
+
+from django.db.models import Q
+from django.utils import timezone
+
+from cinema.cache import namespace
+
+from .models import Booking
+
+FREE = 0
+BOOKED = 1
+HELD = 2
+
+
+def occupied_seats(session_id):
+    """Проданные и придержанные места сеанса; сроки брони проверяет SeatMap.
+
+    Ключ содержит версию сеанса: список, прочитанный до коммита продажи,
+    ляжет под старую версию и больше не будет прочитан.
+    """
+    seatmap = namespace('seatmap')
+    version = seatmap.key_version(session_id)
+    return seatmap.get_or_set(f'{session_id}:{version}', lambda: list(
+        Booking.objects.filter(session_id=session_id).filter(
+            Q(is_booked=True) | Q(held_until__gt=timezone.now())
+        ).values_list('row', 'place', 'is_booked', 'held_until')
+    ))
+
+
+def forget_seats(session_id):
+    namespace('seatmap').bump_key(session_id)
+
+
+class SeatMap:
+    """Занятость мест сеанса: один байт на место, ряды подряд."""
+
+    def __init__(self, rows, places, states=None):
+        self.count_rows = rows
+        self.count_places = places
+        self.states = states or bytearray(rows * places)
+        self.selected = set()
+
+    @classmethod
+    def for_session(cls, session):
+        hall = session.hall
+        seat_map = cls(hall.count_rows, hall.count_places)
+        now = timezone.now()
+        for row, place, is_booked, held_until in occupied_seats(session.id):
+            if is_booked or held_until > now:
+                seat_map.set(row, place, BOOKED if is_booked else HELD)
+        return seat_map
+
+    def _index(self, row, place):
+        if not (1 <= row <= self.count_rows
+                and 1 <= place <= self.count_places):
+            raise IndexError(f'Нет места: ряд {row}, место {place}')
+        return (row - 1) * self.count_places + place - 1
+
+    def contains(self, row, place):
+        return (1 <= row <= self.count_rows
+                and 1 <= place <= self.count_places)
+
+    def set(self, row, place, state):
+        if self.contains(row, place):
+            self.states[self._index(row, place)] = state
+
+    def state(self, row, place):
+        return self.states[self._index(row, place)]
+
+    def is_free(self, row, place):
+        return self.state(row, place) == FREE
+
+    def count_free(self):
+        return self.states.count(FREE)
+
+    def count_total(self):
+        return len(self.states)
+
+    def count_occupied(self):
+        return self.count_total() - self.count_free()
+
+    def row_states(self, row):
+        start = (row - 1) * self.count_places
+        return self.states[start:start + self.count_places]
+
+    def rows(self):
+        for row in range(1, self.count_rows + 1):
+            yield row, [
+                (place, state, (row, place) in self.selected)
+                for place, state in enumerate(self.row_states(row), start=1)
+            ]
+
+    def find_best(self, count):
+        return find_best_seats(self, count)
+
+
+BEST_ROW_POSITION = 0.6
+ROW_WEIGHT = 2.0
+
+_free_runs = {}
+
+
+def free_runs_pattern(count):
+    if count not in _free_runs:
+        _free_runs[count] = re.compile(b'\\x00{%d,}' % count)
+    return _free_runs[count]
+
+
+def find_best_seats(seat_map, count):
+    """Ищет count свободных мест подряд в одном ряду ближе к центру зала.
+
+    Ряды перебираются по удалённости от лучшего ряда, поэтому поиск
+    останавливается, как только штраф за ряд превышает найденный лучший.
+    """
+    rows, places = seat_map.count_rows, seat_map.count_places
+    if count < 1 or count > places:
+        return None
+
+    best_row = 1 + (rows - 1) * BEST_ROW_POSITION
+    best_start = (places - count) / 2
+    pattern = free_runs_pattern(count)
+    result, result_score = None, None
+
+    for row in sorted(range(1, rows + 1), key=lambda r: abs(r - best_row)):
+        row_score = ROW_WEIGHT * abs(row - best_row) / rows
+        if result_score is not None and row_score >= result_score:
+            break
+        for run in pattern.finditer(seat_map.row_states(row)):
+            start = min(max(round(best_start), run.start()),
+                        run.end() - count)
+            score = row_score + abs(start - best_start) / places
+            if result_score is None or score < result_score:
+                result, result_score = (row, start), score
+
+    if result is None:
+        return None
+    row, start = result
+    return [(row, place) for place in range(start + 1, start + count + 1)]
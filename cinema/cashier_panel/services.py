@@ -0,0 +1,175 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from cinema.transactions import immediate_atomic
+from . import live
+from .models import Booking
+from .seatmap import forget_seats
+
+MAX_CART_SEATS = 50
+
+
+class SeatTakenError(Exception):
+    def __init__(self, row, place):
+        super().__init__(f'Место уже занято: ряд {row}, место {place}')
+        self.row = row
+        self.place = place
+
+
+def fill_order(order, session, seats):
+    row, place = seats[0]
+    order.session_id = session.id
+    order.title = session.film.title
+    order.time = timezone.make_aware(
+        datetime.combine(session.date, session.start_time)
+    )
+    order.hall = session.hall.name
+    order.price = session.hall.price * len(seats)
+    order.row = row
+    order.place = place
+    return order
+
+
+def seats_filter(seats):
+    condition = Q()
+    for row, place in seats:
+        condition |= Q(row=row, place=place)
+    return condition
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'SEAT_HOLD_SECONDS', 300))
+
+
+def claimable(user, now):
+    condition = Q(held_until__isnull=True) | Q(held_until__lte=now)
+    if user is not None:
+        condition |= Q(held_by=user)
+    return condition
+
+
+def seats_changed(session_id, state, seats, **extra):
+    transaction.on_commit(lambda: forget_seats(session_id))
+    live.publish_seats(session_id, state, seats, **extra)
+
+
+def hold_seat(session, row, place, user):
+    now = timezone.now()
+    held_until = now + hold_ttl()
+    with immediate_atomic():
+        held = Booking.objects.filter(
+            session_id=session.id, row=row, place=place, is_booked=False
+        ).filter(claimable(user, now)).update(
+            held_until=held_until, held_by=user
+        )
+        if not held:
+            try:
+                with transaction.atomic():
+                    Booking.objects.create(
+                        session_id=session.id, row=row, place=place,
+                        held_until=held_until, held_by=user
+                    )
+            except IntegrityError:
+                raise SeatTakenError(row, place)
+        seats_changed(session.id, live.HELD, [(row, place)],
+                      until=held_until.isoformat())
+    return held_until
+
+
+def release_expired_holds(now=None, session_id=None):
+    now = now or timezone.now()
+    expired = Booking.objects.filter(is_booked=False, held_until__lte=now)
+    if session_id is not None:
+        expired = expired.filter(session_id=session_id)
+    released = defaultdict(list)
+    with immediate_atomic():
+        pks = []
+        for pk, booking_session_id, row, place in expired.values_list(
+                'pk', 'session_id', 'row', 'place'):
+            pks.append(pk)
+            released[booking_session_id].append((row, place))
+        # Условие повторяется: продлённое после выборки удержание остаётся.
+        count = expired.filter(pk__in=pks).delete()[0]
+        for booking_session_id, seats in released.items():
+            seats_changed(booking_session_id, live.RELEASED, seats)
+    return count
+
+
+def confirm_order(order):
+    with immediate_atomic():
+        order.status = 'confirmed'
+        order.save()
+
+
+def cancel_order(order):
+    with immediate_atomic():
+        order.status = 'cancelled'
+        order.save()
+        seats = list(order.bookings.values_list('row', 'place'))
+        order.bookings.all().delete()
+        seats_changed(order.session_id, live.CANCELLED, seats)
+
+
+def claim_seats(session, seats, order, user=None):
+    now = timezone.now()
+    existing = list(
+        Booking.objects.filter(session_id=session.id).filter(
+            seats_filter(seats)
+        )
+    )
+    for booking in existing:
+        if booking.is_booked or (
+            booking.held_until and booking.held_until > now
+            and booking.held_by_id != getattr(user, 'pk', None)
+        ):
+            raise SeatTakenError(booking.row, booking.place)
+
+    if existing:
+        claimed = Booking.objects.filter(
+            pk__in=[booking.pk for booking in existing], is_booked=False
+        ).filter(claimable(user, now)).update(
+            is_booked=True, order=order, held_until=None, held_by=None
+        )
+        if claimed != len(existing):
+            raise SeatTakenError(existing[0].row, existing[0].place)
+
+    known = {(booking.row, booking.place) for booking in existing}
+    try:
+        with transaction.atomic():
+            Booking.objects.bulk_create([
+                Booking(session_id=session.id, row=row, place=place,
+                        is_booked=True, order=order)
+                for row, place in seats
+                if (row, place) not in known
+            ])
+    except IntegrityError:
+        taken = Booking.objects.filter(session_id=session.id).filter(
+            seats_filter(seats)
+        ).exclude(order=order).first()
+        if taken is None:
+            raise
+        raise SeatTakenError(taken.row, taken.place)
+
+    seats_changed(session.id, live.BOOKED, seats)
+
+
+def book_seats(session, seats, order, user=None):
+    seats = sorted(set(seats))
+    if not seats:
+        raise ValueError('Не выбрано ни одного места')
+    fill_order(order, session, seats)
+    # Номер берётся через отдельное соединение, поэтому до того, как
+    # транзакция займёт блокировку записи.
+    order.assign_ticket_number()
+    with immediate_atomic():
+        order.save()
+        claim_seats(session, seats, order, user)
+    return order
+
+
+def book_seat(session, row, place, order, user=None):
+    return book_seats(session, [(row, place)], order, user)
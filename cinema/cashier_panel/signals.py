@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from admin_panel import stats
+from cinema.cache import watch
+from .models import Order
+from .search import index_order
+
+SEARCH_FIELDS = ('title', 'name', 'slug')
+STATUS_COUNTERS = {
+    'confirmed': stats.ORDERS_CONFIRMED,
+    'cancelled': stats.ORDERS_CANCELLED,
+}
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    instance._stats_status = instance.__dict__.get('status')
+    instance._search_fields = search_fields(instance)
+
+
+def search_fields(order):
+    return tuple(order.__dict__.get(name) for name in SEARCH_FIELDS)
+
+
+@receiver(post_save, sender=Order)
+def count_saved_order(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.ORDERS)
+        stats.bump(stats.ORDERS, 1, timezone.localdate(instance.created_at))
+        previous = None
+    else:
+        previous = instance._stats_status
+    if previous != instance.status:
+        if previous in STATUS_COUNTERS:
+            stats.bump(STATUS_COUNTERS[previous], -1)
+        if instance.status in STATUS_COUNTERS:
+            stats.bump(STATUS_COUNTERS[instance.status])
+    instance._stats_status = instance.status
+
+
+@receiver(post_save, sender=Order)
+def index_saved_order(sender, instance, created, **kwargs):
+    if created or instance._search_fields != search_fields(instance):
+        index_order(instance)
+    instance._search_fields = search_fields(instance)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    stats.bump(stats.ORDERS, -1)
+    stats.bump(stats.ORDERS, -1, timezone.localdate(instance.created_at))
+    if instance._stats_status in STATUS_COUNTERS:
+        stats.bump(STATUS_COUNTERS[instance._stats_status], -1)
+
+
+watch(Order, 'dashboard')
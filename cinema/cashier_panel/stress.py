@@ -0,0 +1,54 @@
+import random
+import threading
+import time
+
+from django.db import OperationalError, connection
+
+from .models import Order
+from .services import SeatTakenError, book_seat
+
+
+def booking_stress(session, seats, workers=8, max_retries=200):
+    """Все потоки пытаются продать одни и те же места в случайном порядке."""
+    stats = {"sold": 0, "taken": 0, "retries": 0, "failed": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def worker(number):
+        order_seats = list(seats)
+        random.Random(number).shuffle(order_seats)
+        barrier.wait()
+        try:
+            for row, place in order_seats:
+                for attempt in range(max_retries):
+                    try:
+                        book_seat(session, row, place,
+                                  Order(name=f"w{number}"))
+                        result = "sold"
+                    except SeatTakenError:
+                        result = "taken"
+                    except OperationalError:
+                        with lock:
+                            stats["retries"] += 1
+                        time.sleep(min(0.001 * (attempt + 1), 0.05))
+                        continue
+                    break
+                else:
+                    result = "failed"
+                with lock:
+                    stats[result] += 1
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(number,))
+        for number in range(workers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats["elapsed"] = time.perf_counter() - started
+    stats["per_second"] = stats["sold"] / stats["elapsed"]
+    return stats
@@ -1,3 +1,384 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from admin_panel.models import Hall, Session
+from cinema import cache
+from films.models import Film
+from .models import Booking, Order, OrderSearchToken
+from . import live
+from .live import broker, route_seat_events
+from .search import search_orders
+from .seatmap import BOOKED, SeatMap, forget_seats, occupied_seats
+from .services import (SeatTakenError, book_seats, hold_seat,
+                       release_expired_holds)
+from .stress import booking_stress
+from .tickets import allocator
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today + timedelta(days=1)
+        )
+        hall = Hall.objects.create(number=1, count_rows=3, count_places=5)
+        self.session = Session.objects.create(
+            film=film, hall=hall, date=today, start_time=time(12, 0)
+        )
+
+    def test_no_double_sales(self):
+        seats = [(row, place) for row in range(1, 4) for place in range(1, 6)]
+
+        workers = 6
+        stats = booking_stress(self.session, seats, workers=workers)
+
+        self.assertEqual(stats['sold'], len(seats))
+        self.assertEqual(stats['taken'], len(seats) * (workers - 1))
+        self.assertGreater(stats['per_second'], 0)
+        self.assertFalse(
+            Booking.objects.values('row', 'place').annotate(
+                n=Count('id')
+            ).filter(n__gt=1).exists()
+        )
+        self.assertEqual(Order.objects.count(), len(seats))
+
+
+class TicketNumberTest(TestCase):
+    def setUp(self):
+        allocator.reset()
+        self.addCleanup(allocator.reset)
+
+    def create_order(self):
+        return Order.objects.create(
+            title='Фильм', name='Гость', time=timezone.now(), hall='Зал',
+            price=300, row=1, place=1, session_id=1
+        )
+
+    def test_order_after_write_in_same_transaction(self):
+        today = timezone.now().date()
+        Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today
+        )
+        first, second = self.create_order(), self.create_order()
+        self.assertNotEqual(first.slug, second.slug)
+        self.assertRegex(first.slug, r'^T\d{6}$')
+
+
+class BestSeatsTest(SimpleTestCase):
+    def test_empty_hall_gets_centre_of_best_row(self):
+        self.assertEqual(SeatMap(10, 10).find_best(3),
+                         [(6, 5), (6, 6), (6, 7)])
+
+    def test_centre_of_next_row_beats_edge_of_best_row(self):
+        seat_map = SeatMap(10, 10)
+        for place in range(4, 8):
+            seat_map.set(6, place, BOOKED)
+        self.assertEqual(seat_map.find_best(3), [(7, 5), (7, 6), (7, 7)])
+
+    def test_no_run_long_enough(self):
+        seat_map = SeatMap(2, 4)
+        seat_map.set(1, 2, BOOKED)
+        seat_map.set(2, 3, BOOKED)
+        self.assertIsNone(seat_map.find_best(3))
+        self.assertIsNone(seat_map.find_best(5))
+        self.assertEqual(seat_map.find_best(2), [(2, 1), (2, 2)])
+
+
+class SeatHoldTest(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today + timedelta(days=1)
+        )
+        hall = Hall.objects.create(number=1, count_rows=3, count_places=5)
+        self.session = Session.objects.create(
+            film=film, hall=hall, date=today + timedelta(days=1),
+            start_time=time(12, 0)
+        )
+        users = get_user_model().objects
+        self.owner = users.create_user('owner', password='pw')
+        self.other = users.create_user('other', password='pw')
+
+    def expire(self, row, place):
+        Booking.objects.filter(row=row, place=place).update(
+            held_until=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_hold_blocks_other_users(self):
+        hold_seat(self.session, 1, 1, self.owner)
+        with self.assertRaises(SeatTakenError):
+            hold_seat(self.session, 1, 1, self.other)
+        with self.assertRaises(SeatTakenError):
+            book_seats(self.session, [(1, 1)], Order(name='other'),
+                       self.other)
+
+    def test_owner_books_held_seat(self):
+        hold_seat(self.session, 1, 1, self.owner)
+        order = book_seats(self.session, [(1, 1)], Order(name='owner'),
+                           self.owner)
+        booking = Booking.objects.get(row=1, place=1)
+        self.assertTrue(booking.is_booked)
+        self.assertEqual(booking.order, order)
+        self.assertIsNone(booking.held_until)
+
+    def test_expired_hold_can_be_taken(self):
+        hold_seat(self.session, 1, 1, self.owner)
+        self.expire(1, 1)
+        hold_seat(self.session, 1, 1, self.other)
+        self.assertEqual(Booking.objects.get(row=1, place=1).held_by,
+                         self.other)
+
+    def test_release_removes_only_expired_holds(self):
+        hold_seat(self.session, 1, 1, self.owner)
+        hold_seat(self.session, 1, 2, self.owner)
+        self.expire(1, 1)
+        self.assertEqual(release_expired_holds(), 1)
+        self.assertEqual(
+            list(Booking.objects.values_list('row', 'place')), [(1, 2)]
+        )
+
+
+class BookingCartTest(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today + timedelta(days=1)
+        )
+        hall = Hall.objects.create(number=1, count_rows=3, count_places=5)
+        self.session = Session.objects.create(
+            film=film, hall=hall, date=today + timedelta(days=1),
+            start_time=time(12, 0)
+        )
+        self.client.force_login(
+            get_user_model().objects.create_user('cashier', password='pw')
+        )
+        self.url = reverse('cashier_panel:booking_cart',
+                           args=[self.session.pk])
+
+    def test_cart_books_every_seat(self):
+        response = self.client.post(self.url, {
+            'name': 'Гость', 'seats': ['1-1', '1-2', '1-3'],
+        })
+        order = Order.objects.get()
+        self.assertRedirects(response, reverse(
+            'cashier_panel:booking_success', args=[order.slug]
+        ))
+        self.assertEqual(
+            list(order.bookings.order_by('place').values_list(
+                'row', 'place'
+            )),
+            [(1, 1), (1, 2), (1, 3)]
+        )
+
+    def test_taken_seat_fails_whole_cart(self):
+        Booking.objects.create(session_id=self.session.pk, row=1, place=2,
+                               is_booked=True)
+        response = self.client.post(self.url, {
+            'name': 'Гость', 'seats': ['1-1', '1-2', '1-3'],
+        }, follow=True)
+        self.assertContains(response, 'Место уже занято: ряд 1, место 2')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_form_errors_are_reported(self):
+        response = self.client.post(self.url, {
+            'name': 'Гость', 'seats': ['9-9'],
+        }, follow=True)
+        self.assertRedirects(response, reverse(
+            'cashier_panel:seat_selection', args=[self.session.pk]
+        ))
+        self.assertEqual(len(response.context['messages']), 1)
+        self.assertFalse(Booking.objects.exists())
+
+
+class OrderSearchTest(TestCase):
+    def create_order(self, title, name):
+        return Order.objects.create(
+            title=title, name=name, time=timezone.now(), hall='Зал',
+            price=300, row=1, place=1, session_id=1
+        )
+
+    def setUp(self):
+        self.ivan = self.create_order('Дюна', 'Иван')
+        self.film = self.create_order('Иван Грозный', 'Пётр')
+        self.maria = self.create_order('Дюна', 'Мария')
+
+    def search(self, query, **kwargs):
+        orders, cursor = search_orders(query, **kwargs)
+        return [order.pk for order in orders], cursor
+
+    def test_name_outranks_film_title(self):
+        self.assertEqual(self.search('иван')[0],
+                         [self.ivan.pk, self.film.pk])
+
+    def test_prefixes_and_every_word_required(self):
+        self.assertEqual(self.search('дю')[0], [self.maria.pk, self.ivan.pk])
+        self.assertEqual(self.search('дюна мар')[0], [self.maria.pk])
+        self.assertEqual(self.search('петр')[0], [self.film.pk])
+
+    def test_ticket_number_without_prefix_and_zeros(self):
+        number = self.maria.slug.lstrip('T').lstrip('0')
+        self.assertEqual(self.search(number)[0][:1], [self.maria.pk])
+        self.assertEqual(self.search(self.maria.slug)[0], [self.maria.pk])
+
+    def test_cursor_continues_ranking(self):
+        first, cursor = self.search('дюна', limit=1)
+        second, cursor = self.search('дюна', after=cursor, limit=1)
+        self.assertEqual(first + second, [self.maria.pk, self.ivan.pk])
+        self.assertIsNone(cursor)
+
+    def test_index_follows_save_and_delete(self):
+        self.ivan.name = 'Олег'
+        self.ivan.save()
+        self.assertEqual(self.search('иван')[0], [self.film.pk])
+        self.assertEqual(self.search('олег')[0], [self.ivan.pk])
+        pk = self.ivan.pk
+        self.ivan.delete()
+        self.assertEqual(self.search('олег')[0], [])
+        self.assertFalse(OrderSearchToken.objects.filter(order_id=pk).exists())
+
+
+class SeatMapCacheTest(TestCase):
+    session_id = 1
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_read_before_commit_is_not_served(self):
+        self.assertEqual(occupied_seats(self.session_id), [])
+        seatmap = cache.namespace('seatmap')
+        version = seatmap.key_version(self.session_id)
+        Booking.objects.create(session_id=self.session_id, row=1, place=1,
+                               is_booked=True)
+        forget_seats(self.session_id)
+        # Читатель, начавший до коммита, кладёт старый список позже
+        seatmap.set(f'{self.session_id}:{version}', [])
+
+        self.assertEqual(
+            [seat[:3] for seat in occupied_seats(self.session_id)],
+            [(1, 1, True)]
+        )
+
+
+class SimulatedClient:
+    def __init__(self, application, path, cookie=None):
+        self.application = application
+        self.scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'headers': [(b'cookie', cookie.encode())] if cookie else [],
+        }
+        self.incoming = asyncio.Queue()
+        self.status = None
+        self.events = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message.get('body', b'').startswith(b'event: seats'):
+            data = message['body'].decode().split('data: ', 1)[1]
+            self.events.append(json.loads(data))
+
+    def run(self):
+        return asyncio.ensure_future(
+            self.application(self.scope, self.receive, self.send)
+        )
+
+    def disconnect(self):
+        self.incoming.put_nowait({'type': 'http.disconnect'})
+
+
+class SeatEventsCase:
+    session_id = 1
+
+    def setUp(self):
+        user = get_user_model().objects.create_user('cashier', password='pw')
+        self.client.force_login(user)
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'
+        self.path = f'/cashier_panel/session/{self.session_id}/events/'
+
+    async def not_found(self, scope, receive, send):
+        raise AssertionError('Запрос не должен доходить до Django')
+
+    async def wait_subscribers(self, count):
+        for _ in range(500):
+            if broker.subscribers_count(self.session_id) == count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f'Ожидалось подписчиков: {count}')
+
+
+class SeatEventsTest(SeatEventsCase, TestCase):
+    async def test_delta_reaches_every_client(self):
+        application = route_seat_events(self.not_found)
+        clients = [
+            SimulatedClient(application, self.path, self.cookie)
+            for _ in range(5)
+        ]
+        tasks = [client.run() for client in clients]
+        await self.wait_subscribers(len(clients))
+
+        event = {'state': 'booked', 'seats': [[3, 4], [3, 5]]}
+        broker.publish(self.session_id, event)
+        broker.publish(self.session_id + 1, {'state': 'held', 'seats': []})
+        for _ in range(500):
+            if all(client.events for client in clients):
+                break
+            await asyncio.sleep(0.01)
+
+        for client in clients:
+            client.disconnect()
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+        for client in clients:
+            self.assertEqual(client.status, 200)
+            self.assertEqual(client.events, [event])
+        self.assertEqual(broker.subscribers_count(), 0)
+
+    async def test_anonymous_client_is_rejected(self):
+        client = SimulatedClient(route_seat_events(self.not_found), self.path)
+        await asyncio.wait_for(client.run(), timeout=5)
+        self.assertEqual(client.status, 403)
+
+
+class HoldExpiryEventsTest(SeatEventsCase, TransactionTestCase):
+    # Рассылка идёт после коммита, поэтому нужны настоящие транзакции
+    async def test_stream_releases_expired_holds(self):
+        await sync_to_async(Booking.objects.create)(
+            session_id=self.session_id, row=2, place=3,
+            held_until=timezone.now() - timedelta(seconds=1)
+        )
+        client = SimulatedClient(route_seat_events(self.not_found),
+                                 self.path, self.cookie)
+        with mock.patch.object(live, 'KEEPALIVE_SECONDS', 0.01):
+            task = client.run()
+            for _ in range(500):
+                if client.events:
+                    break
+                await asyncio.sleep(0.01)
+            client.disconnect()
+            await asyncio.wait_for(task, timeout=5)
+
+        self.assertEqual(client.events,
+                         [{'state': 'released', 'seats': [[2, 3]]}])
+        self.assertFalse(await sync_to_async(Booking.objects.exists)())
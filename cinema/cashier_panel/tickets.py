@@ -0,0 +1,109 @@
+import threading
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, connections,
+                       transaction)
+
+from .models import TicketSequence
+
+ORDER_SEQUENCE = 'order'
+
+
+class TicketNumberAllocator:
+    """Выдаёт номера билетов из блоков, заранее забронированных в БД.
+
+    Блок резервируется одним UPDATE на отдельном соединении и сразу
+    фиксируется, поэтому откат транзакции продажи не вернёт номера
+    в общий счётчик и они не достанутся другому процессу повторно.
+
+    Внутри открытой транзакции отдельное соединение упёрлось бы в её
+    блокировку записи (SQLite), поэтому там номер берётся по одному на
+    основном соединении и в блок не кэшируется: откат вернёт его в счётчик.
+    """
+
+    def __init__(self, name=ORDER_SEQUENCE, block_size=None,
+                 using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.block_size = block_size or getattr(
+            settings, 'TICKET_BLOCK_SIZE', 100
+        )
+        self.using = using
+        self._lock = threading.Lock()
+        self._connection = None
+        self._next = self._end = 0
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                if connections[self.using].in_atomic_block:
+                    return self._reserve_in_transaction()
+                self._next, self._end = self._reserve()
+            number = self._next
+            self._next += 1
+            return number
+
+    def reset(self):
+        with self._lock:
+            self._next = self._end = 0
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = connections.create_connection(self.using)
+            self._connection.inc_thread_sharing()
+        return self._connection
+
+    def _reserve_in_transaction(self):
+        connection = connections[self.using]
+        try:
+            with transaction.atomic(using=self.using):
+                return self._bump(connection, 1) - 1
+        except IntegrityError:
+            with transaction.atomic(using=self.using):
+                return self._bump(connection, 1) - 1
+
+    def _reserve(self):
+        connection = self._get_connection()
+        connection.set_autocommit(False)
+        try:
+            end = self._bump(connection, self.block_size)
+            connection.commit()
+        except IntegrityError:
+            connection.rollback()
+            end = self._bump(connection, self.block_size)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.set_autocommit(True)
+        return end - self.block_size, end
+
+    def _bump(self, connection, size):
+        table = connection.ops.quote_name(TicketSequence._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET next_value = next_value + %s '
+                f'WHERE name = %s',
+                [size, self.name]
+            )
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    f'INSERT INTO {table} (name, next_value) VALUES (%s, %s)',
+                    [self.name, 1 + size]
+                )
+                return 1 + size
+            cursor.execute(
+                f'SELECT next_value FROM {table} WHERE name = %s',
+                [self.name]
+            )
+            return cursor.fetchone()[0]
+
+
+allocator = TicketNumberAllocator()
+
+
+def allocate_ticket_number():
+    return allocator.allocate()
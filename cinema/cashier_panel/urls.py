@@ -11,6 +11,10 @@ urlpatterns = [
          views.SessionSeatSelectionView.as_view(), name='seat_selection'),
     path('session/<int:session_id>/book/<int:row>/<int:place>/',
          views.BookingCreateView.as_view(), name='booking_create'),
+    path('session/<int:session_id>/events/',
+         views.SeatEventsView.as_view(), name='seat_events'),
+    path('session/<int:session_id>/cart/',
+         views.BookingCartView.as_view(), name='booking_cart'),
     path('booking/success/<slug:order_slug>/',
          views.BookingSuccessView.as_view(), name='booking_success'),
     path('order/confirm/<slug:order_slug>/',
@@ -1,6 +1,12 @@
-from .models import Booking, Order
+from .models import Order
 from admin_panel.models import Session
-from .forms import BookingForm
+from admin_panel.stats import cashier_stats
+from cinema.cache import namespace
+from .forms import BookingForm, CartForm
+from .search import search_orders
+from .seatmap import SeatMap
+from .services import (SeatTakenError, book_seat, book_seats, cancel_order,
+                       confirm_order, hold_seat)
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, get_object_or_404, redirect
@@ -8,6 +14,7 @@ from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
+from django.http import Http404, HttpResponse
 from datetime import datetime
 
 
@@ -51,35 +58,42 @@ class CashierLogoutView(View):
 class CashierDashboardView(CashierRequiredMixin, View):
     def get(self, request):
         query = request.GET.get("q", "")
+        next_cursor = None
 
         if query:
-            orders = Order.objects.filter(title__iregex=query)
+            orders, next_cursor = search_orders(
+                query, after=request.GET.get("after")
+            )
         else:
             orders = Order.objects.all().order_by("-created_at")[:10]
 
-        total_orders = Order.objects.count()
-        today_orders = Order.objects.filter(
-            created_at__date=datetime.now().date()
-        ).count()
-
         context = {
             "recent_orders": orders,
-            "total_orders": total_orders,
-            "today_orders": today_orders,
             "query": query,
+            "next_cursor": next_cursor,
         }
+        context.update(namespace("dashboard").get_or_set(
+            "cashier", cashier_stats
+        ))
         return render(request, "cashier_panel/cashier_dashboard.html", context)
 
 
 class SessionSeatSelectionView(CashierRequiredMixin, View):
     def get(self, request, session_id):
-        session = get_object_or_404(Session, id=session_id)
-        hall = session.hall
-        self.create_bookings(session, hall)
-        bookings = Booking.objects.filter(session_id=session_id)
-        seats_matrix = self.create_seats_matrix(
-            bookings, hall.count_rows, hall.count_places
+        session = get_object_or_404(
+            Session.objects.select_related("film", "hall"), id=session_id
         )
+        hall = session.hall
+        seat_map = SeatMap.for_session(session)
+
+        best = request.GET.get("best", "")
+        best = int(best) if best.isdigit() else None
+        if best:
+            suggested = seat_map.find_best(best)
+            if suggested:
+                seat_map.selected.update(suggested)
+            else:
+                messages.error(request, f"Нет {best} свободных мест подряд")
 
         return render(
             request,
@@ -87,43 +101,33 @@ class SessionSeatSelectionView(CashierRequiredMixin, View):
             {
                 "session": session,
                 "hall": hall,
-                "seats_matrix": seats_matrix,
-                "total_rows": range(1, hall.count_rows + 1),
-                "seats_per_row": hall.count_places,
+                "seat_map": seat_map,
+                "free_seats": seat_map.count_free(),
+                "best": best,
             },
         )
 
-    def create_bookings(self, session, hall):
-        total_seats = hall.count_rows * hall.count_places
-        existing_count = Booking.objects.filter(session_id=session.id).count()
-
-        if existing_count != total_seats:
-            Booking.objects.filter(session_id=session.id).delete()
-            bookings_to_create = [
-                Booking(session_id=session.id, row=row, place=seat,
-                        is_booked=False)
-                for row in range(1, hall.count_rows + 1)
-                for seat in range(1, hall.count_places + 1)
-            ]
-            Booking.objects.bulk_create(bookings_to_create)
-
-    def create_seats_matrix(self, bookings, rows, seats_per_row):
-        return {
-            row: {
-                seat: bookings.filter(row=row, place=seat).first().is_booked
-                for seat in range(1, seats_per_row + 1)
-            }
-            for row in range(1, rows + 1)
-        }
-
 
 class BookingCreateView(CashierRequiredMixin, View):
+    def get_session(self, session_id, row, place):
+        session = get_object_or_404(
+            Session.objects.select_related("film", "hall"), id=session_id
+        )
+        hall = session.hall
+        if not (1 <= row <= hall.count_rows
+                and 1 <= place <= hall.count_places):
+            raise Http404("Такого места нет в зале")
+        return session
+
     def get(self, request, session_id, row, place):
-        session = get_object_or_404(Session, id=session_id)
+        session = self.get_session(session_id, row, place)
 
-        booking = get_object_or_404(
-            Booking, session_id=session_id, row=row, place=place
-        )
+        try:
+            held_until = hold_seat(session, row, place, request.user)
+        except SeatTakenError as error:
+            messages.error(request, str(error))
+            return redirect("cashier_panel:seat_selection",
+                            session_id=session_id)
 
         initial_data = {
             "title": session.film.title,
@@ -139,27 +143,25 @@ class BookingCreateView(CashierRequiredMixin, View):
             "session": session,
             "row": row,
             "place": place,
-            "booking": booking,
+            "held_until": held_until,
         }
         return render(request, "cashier_panel/booking_form.html", context)
 
     def post(self, request, session_id, row, place):
-        session = get_object_or_404(Session, id=session_id)
-
-        booking = get_object_or_404(
-            session_id=session_id, row=row, place=place, is_booked=False
-        )
+        session = self.get_session(session_id, row, place)
 
         form = BookingForm(request.POST)
         if form.is_valid():
-            order = form.save(commit=False)
-            order.session_id = session_id
-            order.save()
-            booking.is_booked = True
-            booking.order = order
-            booking.save()
+            try:
+                order = book_seat(session, row, place, form.save(commit=False),
+                                  request.user)
+            except SeatTakenError as error:
+                messages.error(request, str(error))
+                return redirect("cashier_panel:seat_selection",
+                                session_id=session_id)
 
-            return redirect("cashier_panel:booking_success", order_slug=order.slug)
+            return redirect("cashier_panel:booking_success",
+                            order_slug=order.slug)
 
         context = {
             "form": form,
@@ -170,10 +172,51 @@ class BookingCreateView(CashierRequiredMixin, View):
         return render(request, "cashier_panel/booking_form.html", context)
 
 
+class BookingCartView(CashierRequiredMixin, View):
+    @method_decorator(require_POST)
+    def post(self, request, session_id):
+        session = get_object_or_404(
+            Session.objects.select_related("film", "hall"), id=session_id
+        )
+        form = CartForm(request.POST, hall=session.hall)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return redirect("cashier_panel:seat_selection",
+                            session_id=session_id)
+
+        try:
+            order = book_seats(
+                session, form.cleaned_data["seats"],
+                Order(name=form.cleaned_data["name"]), request.user
+            )
+        except SeatTakenError as error:
+            messages.error(request, str(error))
+            return redirect("cashier_panel:seat_selection",
+                            session_id=session_id)
+
+        return redirect("cashier_panel:booking_success", order_slug=order.slug)
+
+
+class SeatEventsView(CashierRequiredMixin, View):
+    def get(self, request, session_id):
+        # Поток событий обслуживает ASGI-приложение (cashier_panel.live),
+        # при запуске через WSGI браузер получает 204 и не переподключается.
+        return HttpResponse(status=204)
+
+
 class BookingSuccessView(CashierRequiredMixin, View):
     def get(self, request, order_slug):
         order = get_object_or_404(Order, slug=order_slug)
-        return render(request, "cashier_panel/booking_success.html", {"order": order})
+        return render(
+            request,
+            "cashier_panel/booking_success.html",
+            {
+                "order": order,
+                "bookings": order.bookings.order_by("row", "place"),
+            },
+        )
 
 
 class ConfirmOrderView(CashierRequiredMixin, View):
@@ -182,8 +225,7 @@ class ConfirmOrderView(CashierRequiredMixin, View):
         order = get_object_or_404(Order, slug=order_slug)
 
         if order.status != "confirmed":
-            order.status = "confirmed"
-            order.save()
+            confirm_order(order)
 
         return redirect("cashier_panel:cashier_dashboard")
 
@@ -194,12 +236,6 @@ class CancelOrderView(CashierRequiredMixin, View):
         order = get_object_or_404(Order, slug=order_slug)
 
         if order.status != "cancelled":
-            order.status = "cancelled"
-            order.save()
-
-            if hasattr(order, "booking"):
-                order.booking.is_booked = False
-                order.booking.order = None
-                order.booking.save()
+            cancel_order(order)
 
         return redirect("cashier_panel:cashier_dashboard")
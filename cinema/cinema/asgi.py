@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinema.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from cashier_panel.live import route_seat_events  # noqa: E402
+
+application = route_seat_events(django_application)
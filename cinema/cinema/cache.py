@@ -0,0 +1,255 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+DEFAULT_NAMESPACE = {'timeout': 300, 'front_size': 128}
+MISSING = object()
+
+
+class LRUCache:
+    """Кэш внутри процесса: ограничен по размеру и по времени жизни."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'size': len(self._data), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class Namespace:
+    """Группа ключей с общей версией в общем кэше и LRU процесса перед ним.
+
+    invalidate() меняет версию, и все ключи пространства устаревают сразу.
+    Другие процессы узнают новую версию не позже чем через front_seconds.
+    """
+
+    def __init__(self, name, backend, timeout, front_size, front_seconds):
+        self.name = name
+        self.backend = backend
+        self.timeout = timeout
+        self.front_seconds = front_seconds
+        self.front = LRUCache(front_size, front_seconds)
+        self._version = None
+        self._version_checked = 0
+        self.shared_hits = self.shared_misses = self.invalidations = 0
+
+    @property
+    def version_key(self):
+        return f'cinema:{self.name}:version'
+
+    def version(self):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > \
+                self.front_seconds:
+            version = self.shared_version(self.version_key)
+            if version != self._version:
+                self.front.clear()
+            self._version, self._version_checked = version, now
+        return self._version
+
+    def shared_version(self, version_key):
+        # Пропавшая версия заменяется новой, а не начинается заново:
+        # старые ключи не должны снова стать видимыми.
+        version = self.backend.get(version_key)
+        if version is None:
+            self.backend.add(version_key, time.time_ns(), None)
+            version = self.backend.get(version_key)
+        return version
+
+    def key_version(self, key):
+        """Версия отдельного ключа, читается из общего кэша каждый раз."""
+        return self.shared_version(f'cinema:{self.name}:version:{key}')
+
+    def bump_key(self, key):
+        self.backend.set(f'cinema:{self.name}:version:{key}',
+                         time.time_ns(), None)
+
+    def make_key(self, key):
+        return f'cinema:{self.name}:{self.version()}:{key}'
+
+    def get(self, key, default=None):
+        full_key = self.make_key(key)
+        value = self.front.get(full_key)
+        if value is MISSING:
+            value = self.backend.get(full_key, MISSING)
+            if value is MISSING:
+                self.shared_misses += 1
+                return default
+            self.shared_hits += 1
+            self.front.set(full_key, value)
+        return value
+
+    def get_many(self, keys):
+        full_keys = {self.make_key(key): key for key in keys}
+        found = {}
+        for full_key, key in full_keys.items():
+            value = self.front.get(full_key)
+            if value is not MISSING:
+                found[key] = value
+        missing = [full_key for full_key, key in full_keys.items()
+                   if key not in found]
+        shared = self.backend.get_many(missing)
+        self.shared_hits += len(shared)
+        self.shared_misses += len(missing) - len(shared)
+        for full_key, value in shared.items():
+            self.front.set(full_key, value)
+            found[full_keys[full_key]] = value
+        return found
+
+    def set(self, key, value):
+        full_key = self.make_key(key)
+        self.backend.set(full_key, value, self.timeout)
+        self.front.set(full_key, value)
+
+    def set_many(self, mapping):
+        full = {self.make_key(key): value for key, value in mapping.items()}
+        self.backend.set_many(full, self.timeout)
+        for full_key, value in full.items():
+            self.front.set(full_key, value)
+
+    def get_or_set(self, key, factory):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete_many(self, keys):
+        full_keys = [self.make_key(key) for key in keys]
+        self.backend.delete_many(full_keys)
+        for full_key in full_keys:
+            self.front.delete(full_key)
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def invalidate(self):
+        self.backend.set(self.version_key, time.time_ns(), None)
+        self.invalidations += 1
+        self._version = None
+        self.front.clear()
+
+    def metrics(self):
+        return {
+            'front': self.front.metrics(),
+            'shared_hits': self.shared_hits,
+            'shared_misses': self.shared_misses,
+            'invalidations': self.invalidations,
+        }
+
+    def reset(self):
+        self._version = None
+        self.front.clear()
+
+
+_namespaces = {}
+_lock = threading.Lock()
+
+
+def config():
+    return getattr(settings, 'CINEMA_CACHE', {})
+
+
+def namespace(name):
+    try:
+        return _namespaces[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _namespaces:
+            options = {**DEFAULT_NAMESPACE,
+                       **config().get('NAMESPACES', {}).get(name, {})}
+            _namespaces[name] = Namespace(
+                name, caches[config().get('BACKEND', 'default')],
+                options['timeout'], options['front_size'],
+                config().get('FRONT_SECONDS', 2),
+            )
+        return _namespaces[name]
+
+
+@receiver(setting_changed)
+def forget_namespaces(setting, **kwargs):
+    if setting in ('CACHES', 'CINEMA_CACHE'):
+        with _lock:
+            _namespaces.clear()
+
+
+def invalidate(*names):
+    for name in names:
+        namespace(name).invalidate()
+
+
+def invalidate_on_commit(*names):
+    transaction.on_commit(lambda: invalidate(*names))
+
+
+def watch(model, *names):
+    """Сбрасывает пространства после сохранения и удаления объектов модели."""
+    def receiver(sender, **kwargs):
+        invalidate_on_commit(*names)
+
+    uid = f'cinema.cache:{model._meta.label}:{",".join(names)}'
+    post_save.connect(receiver, sender=model, weak=False,
+                      dispatch_uid=uid)
+    post_delete.connect(receiver, sender=model, weak=False,
+                        dispatch_uid=uid)
+
+
+def clear():
+    caches[config().get('BACKEND', 'default')].clear()
+    for item in list(_namespaces.values()):
+        item.reset()
+
+
+def metrics():
+    return {name: item.metrics()
+            for name, item in sorted(_namespaces.items())}
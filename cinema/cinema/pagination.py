@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 20
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, fields, cursor):
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ))
+        if len(values) != len(fields):
+            return None
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, descending), value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def seek_filter(fields, values):
+    """(a > x) OR (a = x AND b > y) OR ... с учётом направления сортировки."""
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(fields, values):
+        lookup = f'{name}__lt' if descending else f'{name}__gt'
+        condition |= equal & Q(**{lookup: value})
+        equal &= Q(**{name: value})
+    # Нестрогая граница по первому полю даёт индексу диапазон для поиска.
+    (name, descending), value = fields[0], values[0]
+    return Q(**{f'{name}__lte' if descending else f'{name}__gte': value}) & (
+        condition
+    )
+
+
+def keyset_page(queryset, fields, after=None, size=PAGE_SIZE):
+    """Страница по ключу сортировки вместо OFFSET.
+
+    fields — пары (поле, по убыванию), последним должно идти уникальное
+    поле. Возвращает объекты страницы и курсор следующей страницы.
+    """
+    values = decode_cursor(queryset.model, fields, after)
+    if values is not None:
+        queryset = queryset.filter(seek_filter(fields, values))
+    queryset = queryset.order_by(*(
+        f'-{name}' if descending else name for name, descending in fields
+    ))
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    return rows, encode_cursor([
+        getattr(rows[-1], name) for name, descending in fields
+    ])
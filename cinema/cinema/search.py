@@ -0,0 +1,110 @@
+import re
+
+from django.db.models import Case, Count, Q, Sum, Value, When
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'^[а-я]+$')
+MAX_TOKEN_LENGTH = 64
+MAX_TERMS = 5
+PREFIX_END = '\uffff'
+MIN_STEM_LENGTH = 4
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах', 'ией', 'ого', 'его', 'ому',
+    'ему', 'ыми', 'ими', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ую', 'юю', 'ов', 'ев', 'ом', 'ем', 'ам', 'ям', 'ия', 'ья',
+    'ье', 'ью', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def tokenize(text):
+    return [
+        word[:MAX_TOKEN_LENGTH]
+        for word in WORD.findall(normalize(text or ''))
+    ]
+
+
+def stem(word):
+    """Отбрасывает типичное окончание русского слова.
+
+    Используется только для слов запроса: в индексе лежат полные слова,
+    а основа ищется как их префикс, поэтому «фильмов» находит «фильмы».
+    """
+    if not CYRILLIC.match(word):
+        return word
+    for ending in ENDINGS:
+        stem_length = len(word) - len(ending)
+        if word.endswith(ending) and stem_length >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def query_terms(query, stemmed=False):
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+    if stemmed:
+        terms = list(dict.fromkeys(stem(term) for term in terms))
+    return terms
+
+
+def prefix_lookup(field, prefix):
+    """Условие «начинается с» в виде диапазона, который использует индекс."""
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END}
+
+
+def encode_cursor(*values):
+    return ':'.join(str(value) for value in values)
+
+
+def decode_cursor(cursor, count):
+    parts = (cursor or '').split(':')
+    if len(parts) != count or not all(part.isdigit() for part in parts):
+        return None
+    return [int(part) for part in parts]
+
+
+def ranked_hits(tokens, owner, terms, after=None, limit=20):
+    """Ранжирует владельцев слов, у которых совпали все префиксы terms.
+
+    tokens — queryset модели слов с полями token и weight, owner — имя
+    поля-ссылки на владельца. Возвращает список пар (id, вес) и курсор
+    «вес:id» для следующей страницы.
+    """
+    owner_id = f'{owner}_id'
+    matched = Q()
+    term_number = []
+    for number, term in enumerate(terms):
+        condition = Q(**prefix_lookup('token', term))
+        matched |= condition
+        term_number.append(When(condition, then=Value(number)))
+
+    hits = tokens.filter(matched).values(owner_id).annotate(
+        score=Sum('weight'),
+        terms=Count(Case(*term_number), distinct=True),
+    ).filter(terms=len(terms)).order_by('-score', f'-{owner_id}')
+
+    cursor = decode_cursor(after, 2)
+    if cursor:
+        score, last_id = cursor
+        hits = hits.filter(
+            Q(score__lt=score) | Q(score=score, **{f'{owner_id}__lt': last_id})
+        )
+
+    hits = [(hit[owner_id], hit['score']) for hit in hits[:limit + 1]]
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(*reversed(hits[-1]))
+    return hits, next_cursor
+
+
+def load_ranked(queryset, hits):
+    objects = queryset.in_bulk([pk for pk, _ in hits])
+    page = []
+    for pk, score in hits:
+        if pk in objects:
+            objects[pk].score = score
+            page.append(objects[pk])
+    return page
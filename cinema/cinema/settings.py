@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -86,6 +87,58 @@ DATABASES = {
     }
 }
 
+# Общий для всех процессов кэш на диске; перед ним в каждом процессе
+# работает небольшой LRU (cinema.cache).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CINEMA_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'cinema-cache')
+        ),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+CINEMA_CACHE = {
+    'BACKEND': 'default',
+    # Сколько секунд процесс доверяет своему LRU и версии пространства
+    'FRONT_SECONDS': 2,
+    'NAMESPACES': {
+        'schedule': {'timeout': 24 * 60 * 60, 'front_size': 64},
+        'planner': {'timeout': 10 * 60, 'front_size': 16},
+        'catalog': {'timeout': 60 * 60, 'front_size': 128},
+        'seatmap': {'timeout': 60, 'front_size': 0},
+        'dashboard': {'timeout': 30, 'front_size': 8},
+    },
+}
+
+# Тесты подменяют общий кэш на LocMem, чтобы не трогать кэш сервера
+TEST_RUNNER = 'cinema.test_runner.CinemaTestRunner'
+
+# Профиль базы: development — SQLite как есть, production — WAL, ожидание
+# блокировок и BEGIN IMMEDIATE для пишущих транзакций (cinema.sqlite).
+DATABASE_PROFILE = os.environ.get('CINEMA_DB_PROFILE', 'development')
+
+SQLITE_PRODUCTION_OPTIONS = {
+    'timeout': 20,
+    'pragmas': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'cinema.sqlite',
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -138,3 +191,6 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Сколько секунд место удерживается за кассиром, пока он заполняет заказ
+SEAT_HOLD_SECONDS = 5 * 60
@@ -0,0 +1,32 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с PRAGMA из OPTIONS['pragmas'] и BEGIN IMMEDIATE по запросу.
+
+    Транзакция, которая сначала читает, а потом пишет, при обычном BEGIN
+    получает блокировку записи только на первом INSERT/UPDATE и может сразу
+    упасть с "database is locked" — busy timeout в этом случае не ждёт.
+    IMMEDIATE берёт блокировку в начале и ждёт её по таймауту.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.begin_immediate = False
+        self.pragmas = {}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(
+            'BEGIN IMMEDIATE' if self.begin_immediate else 'BEGIN'
+        )
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """atomic(), который на cinema.sqlite сразу берёт блокировку записи."""
+    connection = transaction.get_connection(using)
+    outermost = (not connection.in_atomic_block
+                 and hasattr(connection, 'begin_immediate'))
+    if outermost:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            if outermost:
+                connection.begin_immediate = False
+            yield
+    finally:
+        if outermost:
+            connection.begin_immediate = False
@@ -24,6 +24,7 @@ urlpatterns = [
     path('admin_panel/', include('admin_panel.urls', namespace='admin_panel')),
     path('cashier_panel/', include('cashier_panel.urls',
                                    namespace='cashier_panel')),
+    path('api/v1/', include('films.api_urls', namespace='api_v1')),
 ]
 
 if settings.DEBUG:
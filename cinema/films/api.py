@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.generic import View
+
+from admin_panel.models import Session
+from cashier_panel.seatmap import occupied_seats
+from .conditional import conditional_content
+from .models import Film
+from .schedule import SCHEDULE_DAYS, attach_availability, schedule_days
+
+API_VERSION = 1
+FILM_FIELDS = ('id', 'slug', 'title', 'country', 'time', 'age_limit',
+               'beginning', 'ending', 'poster')
+STREAM_CHUNK = 500
+
+encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def film_row(row):
+    if row['poster']:
+        row['poster'] = default_storage.url(row['poster'])
+    else:
+        row['poster'] = None
+    return row
+
+
+def stream_list(key, rows):
+    yield f'{{"version":{API_VERSION},"{key}":['
+    for number, row in enumerate(rows):
+        yield (',' if number else '') + encoder.encode(row)
+    yield ']}'
+
+
+def api_response(data, **kwargs):
+    return JsonResponse(
+        {'version': API_VERSION, **data}, encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+        **kwargs
+    )
+
+
+def parse_date(value, default):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return default
+
+
+@conditional_content
+class FilmListApiView(View):
+    def get(self, request):
+        films = Film.objects.order_by('title', 'id')
+        if request.GET.get('archive') != '1':
+            films = films.filter(ending__gte=timezone.localdate())
+        rows = films.values(*FILM_FIELDS).iterator(chunk_size=STREAM_CHUNK)
+        return StreamingHttpResponse(
+            stream_list('films', map(film_row, rows)),
+            content_type='application/json'
+        )
+
+
+@conditional_content
+class FilmDetailApiView(View):
+    def get(self, request, slug):
+        film = Film.objects.filter(slug=slug).values(
+            *FILM_FIELDS, 'description'
+        ).first()
+        if film is None:
+            raise Http404
+        return api_response({'film': film_row(film)})
+
+
+class ScheduleApiView(View):
+    def get(self, request):
+        today = timezone.localdate()
+        date_from = min(
+            max(parse_date(request.GET.get('from'), today), today),
+            today + timedelta(days=SCHEDULE_DAYS)
+        )
+        try:
+            count = int(request.GET.get('days', SCHEDULE_DAYS))
+        except ValueError:
+            count = SCHEDULE_DAYS
+        count = min(max(count, 1), SCHEDULE_DAYS)
+
+        days = schedule_days(date_from, count)
+        with_seats = request.GET.get('availability') == '1'
+        if with_seats:
+            days = attach_availability(days)
+
+        films = {}
+        schedule = []
+        for day in days:
+            sessions = []
+            for group in day['films']:
+                film = group['film']
+                films.setdefault(film.pk, {
+                    'slug': film.slug, 'title': film.title,
+                    'time': film.time, 'age_limit': film.age_limit,
+                })
+                for session in group['sessions']:
+                    item = {
+                        'id': session.pk, 'film': film.pk,
+                        'hall': session.hall.name,
+                        'start': session.start_time,
+                        'end': session.end_time,
+                    }
+                    if with_seats:
+                        item['free'] = session.seats_free
+                        item['total'] = session.seats_total
+                    sessions.append(item)
+            schedule.append({'date': day['date'], 'sessions': sessions})
+        return api_response({'films': films, 'days': schedule})
+
+
+class SessionSeatsApiView(View):
+    def get(self, request, pk):
+        session = Session.objects.filter(pk=pk).values(
+            'id', 'date', 'start_time', 'film_id',
+            'hall__count_rows', 'hall__count_places'
+        ).first()
+        if session is None:
+            raise Http404
+        now = timezone.now()
+        taken = sorted(
+            (row, place, is_booked)
+            for row, place, is_booked, held_until in occupied_seats(pk)
+            if is_booked or held_until > now
+        )
+        rows = session['hall__count_rows']
+        places = session['hall__count_places']
+        response = api_response({
+            'session': {
+                'id': session['id'], 'film': session['film_id'],
+                'date': session['date'], 'start': session['start_time'],
+            },
+            'rows': rows,
+            'places': places,
+            'free': rows * places - len(taken),
+            'taken': [[row, place, 'booked' if booked else 'held']
+                      for row, place, booked in taken],
+        })
+        response['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import api
+
+app_name = "api"
+
+urlpatterns = [
+    path('films/', api.FilmListApiView.as_view(), name='film_list'),
+    path('films/<slug:slug>/', api.FilmDetailApiView.as_view(),
+         name='film_detail'),
+    path('schedule/', api.ScheduleApiView.as_view(), name='schedule'),
+    path('sessions/<int:pk>/seats/', api.SessionSeatsApiView.as_view(),
+         name='session_seats'),
+]
@@ -0,0 +1,78 @@
+import hashlib
+import time
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from admin_panel import stats
+from admin_panel.models import Hall, Session, StatCounter
+from .models import Film
+
+AVAILABILITY_SECONDS = 60
+
+CONTENT_VERSION_SQL = '''
+    SELECT
+        (SELECT MAX(updated_at) FROM {film}),
+        (SELECT MAX(updated_at) FROM {session}),
+        (SELECT MAX(updated_at) FROM {hall}),
+        (SELECT value FROM {counter} WHERE key = %s AND day = %s)
+'''
+
+
+def as_datetime(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def content_version(request):
+    """Последние изменения фильмов, сеансов и залов одним запросом."""
+    if not hasattr(request, '_content_version'):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(CONTENT_VERSION_SQL.format(
+                film=quote(Film._meta.db_table),
+                session=quote(Session._meta.db_table),
+                hall=quote(Hall._meta.db_table),
+                counter=quote(StatCounter._meta.db_table),
+            ), [stats.DELETIONS, StatCounter.TOTAL])
+            *latest, deletions = cursor.fetchone()
+        request._content_version = (
+            [as_datetime(value) for value in latest], deletions or 0
+        )
+    return request._content_version
+
+
+def page_etag(request, *parts):
+    latest, deletions = content_version(request)
+    key = '|'.join(map(str, (
+        request.get_full_path(), timezone.localdate(), deletions,
+        *latest, *parts
+    )))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def content_etag(request, *args, **kwargs):
+    return page_etag(request)
+
+
+def availability_etag(request, *args, **kwargs):
+    # Свободные места меняются без правки расписания, поэтому такие
+    # страницы считаются свежими не дольше AVAILABILITY_SECONDS.
+    return page_etag(request, int(time.time()) // AVAILABILITY_SECONDS)
+
+
+def conditional(etag_func):
+    """Условный GET для класса представления по заданному ETag."""
+    return method_decorator(condition(etag_func=etag_func), name='dispatch')
+
+
+# Только ETag: MAX(updated_at) не видит удалений и смены дня, и
+# If-Modified-Since отдавал бы 304 на устаревшую страницу.
+conditional_content = conditional(content_etag)
+conditional_availability = conditional(availability_etag)
@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from admin_panel import stats
+from cinema.cache import invalidate_on_commit
+from cinema.transactions import immediate_atomic
+from .models import Film, allocate_slugs
+from .posters import prepare_poster
+from .search import index_films
+
+FILM_FIELDS = ('title', 'description', 'time', 'country', 'beginning',
+               'ending', 'age_limit')
+
+
+@dataclass
+class ImportResult:
+    valid: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+
+def read_records(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, encoding='utf-8-sig') as source:
+        if fmt == 'json':
+            records = json.load(source)
+            if not isinstance(records, list):
+                raise ValueError('В JSON ожидается список записей')
+            return records
+        if fmt == 'csv':
+            return list(csv.DictReader(source))
+    raise ValueError(f'Неизвестный формат файла: {fmt}')
+
+
+def build_film(record):
+    film = Film(**{
+        name: record[name] for name in FILM_FIELDS if name in record
+    })
+    poster = (record.get('poster') or '').strip()
+    if poster:
+        if not os.path.isfile(os.path.join(settings.MEDIA_ROOT, poster)):
+            raise ValidationError({'poster': f'Файл не найден: {poster}'})
+        film.poster = poster
+
+    film.full_clean(exclude=['slug', 'poster'], validate_unique=False)
+    if film.ending < film.beginning:
+        raise ValidationError(
+            {'ending': 'Конец показа раньше его начала'}
+        )
+    return film
+
+
+def assign_ids(films, chunk=500):
+    """bulk_create на SQLite не возвращает id, подтягиваем их по номерам."""
+    missing = {film.slug: film for film in films if film.pk is None}
+    slugs = list(missing)
+    for offset in range(0, len(slugs), chunk):
+        for slug, pk in Film.objects.filter(
+                slug__in=slugs[offset:offset + chunk]
+        ).values_list('slug', 'pk'):
+            missing[slug].pk = pk
+
+
+def import_films(records, batch_size=500, dry_run=False):
+    result = ImportResult()
+    films = []
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            result.errors.append(
+                (number, {'record': ['Запись должна быть объектом']})
+            )
+            continue
+        try:
+            films.append(build_film(record))
+        except ValidationError as error:
+            result.errors.append((number, error.message_dict))
+
+    result.valid = len(films)
+    if dry_run or not films:
+        return result
+
+    # Копии афиш строятся до транзакции, чтобы не держать блокировку
+    widths = {}
+    for film in films:
+        name = film.poster.name if film.poster else ''
+        if name not in widths:
+            widths[name] = prepare_poster(name)
+        film.poster_widths = widths[name]
+
+    with immediate_atomic():
+        for film, slug in zip(films, allocate_slugs(len(films))):
+            film.slug = slug
+        Film.objects.bulk_create(films, batch_size=batch_size)
+        stats.bump(stats.FILMS, len(films))
+        stats.bump_many(Counter(
+            (stats.FILMS_ENDING, film.ending) for film in films
+        ))
+        assign_ids(films)
+        index_films(films)
+        invalidate_on_commit('planner', 'catalog', 'dashboard')
+    result.created = len(films)
+    return result
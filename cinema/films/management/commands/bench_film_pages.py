@@ -0,0 +1,61 @@
+import time
+from datetime import date, time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cinema.benchmark import scratch_database
+from cinema.pagination import keyset_page
+from films.models import ACTIVE_ORDER, CATALOG_ORDER, Film, allocate_slugs
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк постраничного вывода каталога: OFFSET против ключа'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--films', type=int, default=100000)
+        parser.add_argument('--pages', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            today = timezone.localdate()
+            count = options['films']
+            Film.objects.bulk_create([
+                Film(title=f'Фильм {number:06d}', description='', slug=slug,
+                     time=clock(1, 30), country='',
+                     beginning=date(2000, 1, 1),
+                     ending=today + timedelta(days=number % 40 - 30))
+                for number, slug in enumerate(allocate_slugs(count))
+            ], batch_size=1000)
+
+            for name, queryset, order in (
+                ('прокат', Film.objects.filter(ending__gte=today),
+                 ACTIVE_ORDER),
+                ('каталог', Film.objects.all(), CATALOG_ORDER),
+            ):
+                after = None
+                timings = []
+                for page in range(options['pages']):
+                    (films, after), elapsed = timed(
+                        lambda: keyset_page(queryset, order, after)
+                    )
+                    timings.append(elapsed)
+                    if after is None:
+                        break
+                offset = len(timings) * 20
+                ordering = [f'-{field}' if desc else field
+                            for field, desc in order]
+                _, offset_ms = timed(lambda: list(
+                    queryset.order_by(*ordering)[offset:offset + 20]
+                ))
+                self.stdout.write(
+                    f'{name}: страница 1 {timings[0]:.2f} мс, '
+                    f'страница {len(timings)} {timings[-1]:.2f} мс, '
+                    f'OFFSET {offset} {offset_ms:.2f} мс'
+                )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from films.importer import import_films, read_records
+
+
+class Command(BaseCommand):
+    help = 'Импорт фильмов из CSV или JSON пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'json'))
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только проверить записи')
+
+    def handle(self, *args, **options):
+        try:
+            records = read_records(options['path'], options['format'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            result = import_films(records, batch_size=options['batch_size'],
+                                  dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+
+        for number, errors in result.errors:
+            for name, messages in errors.items():
+                self.stderr.write(f'Запись {number}, {name}: '
+                                  f'{"; ".join(messages)}')
+        self.stdout.write(
+            f'Записей: {len(records)}, корректных: {result.valid}, '
+            f'создано: {result.created}, ошибок: {len(result.errors)}, '
+            f'запросов: {len(queries)}, время: {elapsed:.2f} с'
+        )
@@ -0,0 +1,30 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from films.schedule import SCHEDULE_DAYS, invalidate_days, schedule_days
+
+
+class Command(BaseCommand):
+    help = 'Заполняет кэш публичного расписания, например при деплое'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=SCHEDULE_DAYS)
+        parser.add_argument('--refresh', action='store_true',
+                            help='Сбросить уже закэшированные дни')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['refresh']:
+            invalidate_days(today + timedelta(days=offset)
+                            for offset in range(options['days']))
+        started = time.perf_counter()
+        days = schedule_days(today, options['days'])
+        sessions = sum(len(group['sessions'])
+                       for day in days for group in day['films'])
+        self.stdout.write(
+            f'Дней в кэше: {len(days)}, сеансов: {sessions}, '
+            f'время: {time.perf_counter() - started:.3f} с'
+        )
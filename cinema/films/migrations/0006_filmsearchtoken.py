@@ -0,0 +1,63 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:46
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия разбора на слова на момент миграции: индекс не должен зависеть
+# от того, как films.search устроен сейчас.
+WORD = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+FIELD_WEIGHTS = (('description', 1), ('country', 2), ('title', 5))
+
+
+def tokenize(text):
+    return [
+        word[:MAX_TOKEN_LENGTH]
+        for word in WORD.findall((text or '').lower().replace('ё', 'е'))
+    ]
+
+
+def index_films(apps, schema_editor):
+    Film = apps.get_model('films', 'Film')
+    FilmSearchToken = apps.get_model('films', 'FilmSearchToken')
+    tokens = []
+    for film in Film.objects.iterator():
+        weights = {}
+        for name, weight in FIELD_WEIGHTS:
+            for token in tokenize(getattr(film, name)):
+                weights[token] = max(weights.get(token, 0), weight)
+        tokens.extend(
+            FilmSearchToken(film_id=film.pk, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+    FilmSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('films', '0005_auto_20251120_1530'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Вес')),
+                ('film', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='films.film')),
+            ],
+            options={
+                'verbose_name': 'слово поиска фильмов',
+                'verbose_name_plural': 'Слова поиска фильмов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='filmsearchtoken',
+            index=models.Index(fields=['token', 'weight', 'film'], name='films_films_token_57744e_idx'),
+        ),
+        migrations.RunPython(index_films, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('films', '0007_film_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(fields=['title', 'id'], name='films_film_title_018a96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(fields=['-ending', 'title', 'id'], name='films_film_ending_b37756_idx'),
+        ),
+    ]
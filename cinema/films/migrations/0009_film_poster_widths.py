@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('films', '0008_film_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='film',
+            name='poster_widths',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Ширины копий афиши'),
+        ),
+    ]
@@ -3,6 +3,10 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+SLUG_LOOKUP_CHUNK = 500
+ACTIVE_ORDER = (('title', False), ('id', False))
+CATALOG_ORDER = (('ending', True), ('title', False), ('id', False))
+
 
 class Film(models.Model):
     AGE_LIMIT_CHOICES = [
@@ -35,24 +39,60 @@ class Film(models.Model):
         blank=True,
         null=True
     )
+    poster_widths = models.CharField('Ширины копий афиши', max_length=64,
+                                     blank=True, editable=False)
+    updated_at = models.DateTimeField('Изменён', auto_now=True,
+                                      db_index=True)
 
     class Meta:
         verbose_name = 'фильм'
         verbose_name_plural = 'Фильмы'
         ordering = ('title',)
+        indexes = [
+            models.Index(fields=['title', 'id']),
+            models.Index(fields=['-ending', 'title', 'id']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            count = Film.objects.count()
-            base_slug = str(count + 1)
-            self.slug = base_slug
-            original_slug = self.slug
-            counter = 1
-            while Film.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+            self.slug = allocate_slugs(1)[0]
 
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
+
+
+class FilmSearchToken(models.Model):
+    film = models.ForeignKey(Film, on_delete=models.CASCADE,
+                             related_name='search_tokens')
+    token = models.CharField('Слово', max_length=64)
+    weight = models.PositiveSmallIntegerField('Вес', default=1)
+
+    class Meta:
+        verbose_name = 'слово поиска фильмов'
+        verbose_name_plural = 'Слова поиска фильмов'
+        indexes = [models.Index(fields=['token', 'weight', 'film'])]
+
+    def __str__(self):
+        return self.token
+
+
+def allocate_slugs(count):
+    """Выдаёт count свободных номеров фильмов начиная с count()+1."""
+    slugs = []
+    start = Film.objects.count() + 1
+    while len(slugs) < count:
+        candidates = [
+            str(number)
+            for number in range(start, start + max(count - len(slugs),
+                                                   SLUG_LOOKUP_CHUNK))
+        ]
+        start += len(candidates)
+        for offset in range(0, len(candidates), SLUG_LOOKUP_CHUNK):
+            chunk = candidates[offset:offset + SLUG_LOOKUP_CHUNK]
+            taken = set(Film.objects.filter(slug__in=chunk).values_list(
+                'slug', flat=True
+            ))
+            slugs.extend(slug for slug in chunk if slug not in taken)
+    return slugs[:count]
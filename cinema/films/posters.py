@@ -0,0 +1,87 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+POSTER_WIDTHS = (160, 320, 640)
+WEBP_QUALITY = 80
+DERIVATIVES_DIR = 'posters/derivatives'
+
+
+def derivative_name(name, width):
+    # Хэш полного пути с расширением: film.jpg и film.png из разных
+    # фильмов не должны делить одни и те же копии.
+    stem = os.path.splitext(os.path.basename(name))[0]
+    digest = hashlib.sha1(name.encode()).hexdigest()[:12]
+    return f'{DERIVATIVES_DIR}/{stem}_{digest}_w{width}.webp'
+
+
+def format_widths(widths=POSTER_WIDTHS):
+    return ','.join(map(str, widths))
+
+
+def parse_widths(value):
+    return [int(width) for width in (value or '').split(',') if width]
+
+
+def derivative_names(name):
+    return {width: derivative_name(name, width) for width in POSTER_WIDTHS}
+
+
+def render_derivative(image, width):
+    image = image.copy()
+    if image.width > width:
+        image.thumbnail((width, image.height * width // image.width or 1),
+                        Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def build_derivatives(name, storage=default_storage, force=False):
+    """Создаёт WebP-копии афиши нужных ширин рядом с оригиналом."""
+    names = derivative_names(name)
+    if not force and all(map(storage.exists, names.values())):
+        return 0
+    with storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    for width, target in names.items():
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(render_derivative(image, width)))
+    return len(names)
+
+
+def delete_derivatives(name, storage=default_storage):
+    for target in derivative_names(name).values():
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def prepare_poster(name, storage=default_storage, force=False):
+    """Создаёт копии афиши и возвращает значение для Film.poster_widths."""
+    if not name:
+        return ''
+    try:
+        build_derivatives(name, storage, force)
+    except (OSError, ValueError):
+        return ''
+    return format_widths()
+
+
+def poster_srcset(poster, widths):
+    """Пары (url, ширина) для копий, записанных в Film.poster_widths.
+
+    Существование файлов не проверяется: страница не должна ходить
+    в хранилище на каждый фильм.
+    """
+    if not poster:
+        return []
+    return [
+        (poster.storage.url(derivative_name(poster.name, width)), width)
+        for width in parse_widths(widths)
+    ]
@@ -0,0 +1,94 @@
+import copy
+from datetime import timedelta
+
+from django.utils import timezone
+
+from admin_panel.models import Session
+from cinema.cache import namespace
+
+SCHEDULE_DAYS = 14
+
+
+def day_key(day):
+    return day.isoformat()
+
+
+def group_by_film(sessions):
+    groups = {}
+    for session in sessions:
+        groups.setdefault(session.film_id, {
+            'film': session.film, 'sessions': []
+        })['sessions'].append(session)
+    return list(groups.values())
+
+
+def load_days(days):
+    sessions = {day: [] for day in days}
+    for session in Session.objects.filter(date__in=days).select_related(
+            'film', 'hall').order_by('date', 'start_time', 'hall__number'):
+        sessions[session.date].append(session)
+    return {day: group_by_film(day_sessions)
+            for day, day_sessions in sessions.items()}
+
+
+def schedule_days(start_date=None, count=SCHEDULE_DAYS):
+    """Сгруппированное по фильмам расписание, по ключу кэша на день."""
+    start_date = start_date or timezone.localdate()
+    days = [start_date + timedelta(days=offset) for offset in range(count)]
+    schedule = namespace('schedule')
+    cached = schedule.get_many([day_key(day) for day in days])
+    missing = [day for day in days if day_key(day) not in cached]
+    if missing:
+        loaded = load_days(missing)
+        schedule.set_many({day_key(day): films
+                           for day, films in loaded.items()})
+        cached.update({day_key(day): films for day, films in loaded.items()})
+    return [{'date': day, 'films': cached[day_key(day)]} for day in days]
+
+
+def invalidate_days(days):
+    days = {day for day in days if day is not None}
+    if days:
+        namespace('schedule').delete_many([day_key(day) for day in days])
+
+
+def upcoming_days(**filters):
+    return Session.objects.filter(
+        date__gte=timezone.localdate(), **filters
+    ).values_list('date', flat=True).distinct()
+
+
+def attach_availability(days):
+    """Свободные места всех сеансов окна одним агрегирующим запросом.
+
+    Сеансы из кэша общие для всех запросов процесса, поэтому места
+    проставляются на копиях, а возвращается новый список дней.
+    """
+    if not any(group['sessions'] for day in days for group in day['films']):
+        return days
+    counts = {
+        pk: (total, taken)
+        for pk, total, taken in Session.objects.filter(
+            date__range=[days[0]['date'], days[-1]['date']]
+        ).order_by().with_availability().values_list(
+            'pk', 'seats_total', 'seats_taken'
+        )
+    }
+
+    def with_seats(session):
+        session = copy.copy(session)
+        hall = session.hall
+        session.seats_total, session.seats_taken = counts.get(
+            session.pk, (hall.count_rows * hall.count_places, 0)
+        )
+        return session
+
+    return [
+        {'date': day['date'], 'films': [
+            {'film': group['film'],
+             'sessions': [with_seats(session)
+                          for session in group['sessions']]}
+            for group in day['films']
+        ]}
+        for day in days
+    ]
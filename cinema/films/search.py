@@ -0,0 +1,71 @@
+from django.utils import timezone
+
+from cinema.search import load_ranked, query_terms, ranked_hits, tokenize
+from .models import Film, FilmSearchToken
+
+TITLE_WEIGHT = 5
+COUNTRY_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+PAGE_SIZE = 20
+SUGGEST_SIZE = 8
+
+
+def film_tokens(film):
+    weights = {}
+    fields = (
+        (film.description, DESCRIPTION_WEIGHT),
+        (film.country, COUNTRY_WEIGHT),
+        (film.title, TITLE_WEIGHT),
+    )
+    for text, weight in fields:
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0), weight)
+    return weights
+
+
+def build_tokens(token_model, film):
+    return [
+        token_model(film_id=film.pk, token=token, weight=weight)
+        for token, weight in film_tokens(film).items()
+    ]
+
+
+def index_films(films):
+    films = list(films)
+    FilmSearchToken.objects.filter(film__in=films).delete()
+    FilmSearchToken.objects.bulk_create([
+        token for film in films
+        for token in build_tokens(FilmSearchToken, film)
+    ], batch_size=1000)
+
+
+def active_tokens():
+    return FilmSearchToken.objects.filter(
+        film__ending__gte=timezone.now().date()
+    )
+
+
+def search_films(query, after=None, limit=PAGE_SIZE):
+    """Поиск по названию, стране и описанию фильмов в прокате.
+
+    Слова запроса приводятся к основе и ищутся как префиксы слов индекса,
+    так что подходят и другие падежи, и недописанное последнее слово.
+    """
+    terms = query_terms(query, stemmed=True)
+    if not terms:
+        return [], None
+    hits, next_cursor = ranked_hits(active_tokens(), 'film', terms, after,
+                                    limit)
+    return load_ranked(Film.objects.all(), hits), next_cursor
+
+
+def suggest_films(query, limit=SUGGEST_SIZE):
+    terms = query_terms(query)
+    if not terms:
+        return []
+    hits, _ = ranked_hits(active_tokens(), 'film', terms, limit=limit)
+    films = Film.objects.in_bulk([pk for pk, _ in hits])
+    return [
+        {'title': films[pk].title, 'slug': films[pk].slug}
+        for pk, _ in hits if pk in films
+    ]
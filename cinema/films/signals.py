@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from admin_panel import stats
+from admin_panel.models import Hall, Session
+from cinema.cache import watch
+from .models import Film
+from .posters import delete_derivatives, prepare_poster
+from .schedule import invalidate_days, upcoming_days
+from .search import index_films
+
+SEARCH_FIELDS = ('title', 'description', 'country')
+
+
+def search_fields(film):
+    return tuple(film.__dict__.get(name) for name in SEARCH_FIELDS)
+
+
+def poster_name(film):
+    poster = film.__dict__.get('poster')
+    return getattr(poster, 'name', poster) or None
+
+
+@receiver(post_init, sender=Film)
+def remember_film_ending(sender, instance, **kwargs):
+    instance._stats_ending = instance.__dict__.get('ending')
+    instance._search_fields = search_fields(instance)
+    instance._poster_name = poster_name(instance)
+
+
+@receiver(post_save, sender=Film)
+def count_saved_film(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(stats.FILMS)
+        stats.bump(stats.FILMS_ENDING, 1, instance.ending)
+    else:
+        stats.move(stats.FILMS_ENDING, instance._stats_ending,
+                   instance.ending)
+    instance._stats_ending = instance.ending
+
+
+@receiver(post_save, sender=Film)
+def index_saved_film(sender, instance, created, **kwargs):
+    if created or instance._search_fields != search_fields(instance):
+        index_films([instance])
+    instance._search_fields = search_fields(instance)
+
+
+def forget_poster(name):
+    """Удаляет копии после коммита, если афиша больше никому не нужна."""
+    def delete():
+        if not Film.objects.filter(poster=name).exists():
+            delete_derivatives(name)
+    if name:
+        transaction.on_commit(delete)
+
+
+@receiver(post_save, sender=Film)
+def build_film_posters(sender, instance, **kwargs):
+    old_name, new_name = instance._poster_name, poster_name(instance)
+    if old_name != new_name:
+        # Копии строятся сразу, чтобы шаблону не нужно было их искать
+        instance.poster_widths = prepare_poster(new_name, force=True)
+        Film.objects.filter(pk=instance.pk).update(
+            poster_widths=instance.poster_widths
+        )
+        forget_poster(old_name)
+    instance._poster_name = new_name
+
+
+@receiver(post_delete, sender=Film)
+def delete_film_posters(sender, instance, **kwargs):
+    forget_poster(poster_name(instance))
+
+
+@receiver(post_delete, sender=Film)
+def count_deleted_film(sender, instance, **kwargs):
+    stats.bump(stats.FILMS, -1)
+    stats.bump(stats.FILMS_ENDING, -1, instance._stats_ending)
+    stats.bump(stats.DELETIONS)
+
+
+def invalidate_on_commit(days):
+    days = set(days)
+    transaction.on_commit(lambda: invalidate_days(days))
+
+
+@receiver(post_init, sender=Session)
+def remember_schedule_date(sender, instance, **kwargs):
+    instance._schedule_date = instance.__dict__.get('date')
+
+
+@receiver(post_save, sender=Session)
+def invalidate_saved_session(sender, instance, **kwargs):
+    invalidate_on_commit([instance._schedule_date, instance.date])
+    instance._schedule_date = instance.date
+
+
+@receiver(post_delete, sender=Session)
+def invalidate_deleted_session(sender, instance, **kwargs):
+    invalidate_on_commit([instance._schedule_date])
+
+
+@receiver(post_save, sender=Film)
+def invalidate_saved_film(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_on_commit(upcoming_days(film=instance))
+
+
+@receiver(post_save, sender=Hall)
+def invalidate_saved_hall(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_on_commit(upcoming_days(hall=instance))
+
+
+watch(Film, 'catalog', 'planner', 'dashboard')
@@ -0,0 +1,29 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from films.posters import poster_srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def poster_img(film, sizes='100vw', css_class='', style=''):
+    if not film.poster:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}">',
+            static('images/poster_none.png'), film.title, css_class, style
+        )
+    srcset = poster_srcset(film.poster, film.poster_widths)
+    if not srcset:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="lazy">',
+            film.poster.url, film.title, css_class, style
+        )
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" '
+        'style="{}" loading="lazy">',
+        srcset[-1][0],
+        ', '.join(f'{url} {width}w' for url, width in srcset),
+        sizes, film.title, css_class, style
+    )
@@ -1,3 +1,311 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time as clock
+from datetime import time, timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from admin_panel.models import Hall, Session
+from cashier_panel.models import Booking
+from cinema import cache
+from cinema.pagination import keyset_page
+from .importer import import_films
+from .models import ACTIVE_ORDER, CATALOG_ORDER, Film, FilmSearchToken
+from .posters import derivative_name, derivative_names
+from .schedule import SCHEDULE_DAYS, attach_availability, schedule_days
+from .search import search_films, suggest_films
+
+
+class DerivativeNameTest(SimpleTestCase):
+    def test_extension_and_directory_keep_names_apart(self):
+        names = {
+            derivative_name(poster, 160)
+            for poster in ('posters/film.jpg', 'posters/film.png',
+                           'posters/old/film.jpg')
+        }
+        self.assertEqual(len(names), 3)
+
+
+class PosterDerivativesTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        today = timezone.localdate()
+        image = BytesIO()
+        Image.new('RGB', (800, 1200)).save(image, 'JPEG')
+        self.film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today,
+            poster=SimpleUploadedFile('film.jpg', image.getvalue()),
+        )
+        self.names = list(derivative_names(self.film.poster.name).values())
+
+    def test_saved_poster_records_derivatives(self):
+        self.assertEqual(self.film.poster_widths, '160,320,640')
+        self.assertTrue(all(map(default_storage.exists, self.names)))
+        film = Film.objects.get(pk=self.film.pk)
+        with mock.patch.object(FileSystemStorage, 'exists') as exists:
+            html = Template('{% load posters %}{% poster_img film %}').render(
+                Context({'film': film})
+            )
+        exists.assert_not_called()
+        self.assertIn('640w', html)
+
+    def test_delete_removes_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.delete()
+        self.assertFalse(any(map(default_storage.exists, self.names)))
+
+
+class ConditionalFilmListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        self.films = [
+            Film.objects.create(
+                title=f'Фильм {number}', description='', time=time(1, 30),
+                country='', beginning=today,
+                ending=today + timedelta(days=10),
+            )
+            for number in range(2)
+        ]
+        self.url = reverse('films:film_list')
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_deletion_is_never_answered_with_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.films[0].delete()
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=http_date(clock.time() + 60)
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotContains(response, 'Фильм 0')
+
+    def test_broken_cursors_are_not_cached(self):
+        catalog = cache.namespace('catalog')
+        self.client.get(self.url)
+        for number in range(5):
+            response = self.client.get(self.url, {'after': f'junk{number}'})
+            self.assertContains(response, 'Фильм 0')
+        self.assertEqual(catalog.front.metrics()['size'], 1)
+
+
+class ScheduleApiTest(TestCase):
+    def test_far_future_start_is_clamped(self):
+        response = self.client.get(
+            reverse('api_v1:schedule'), {'from': '9999-12-31'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['days'][0]['date'],
+            (timezone.localdate() + timedelta(days=SCHEDULE_DAYS)).isoformat()
+        )
+
+
+class ImportFilmsTest(TestCase):
+    def test_non_object_records_are_reported(self):
+        result = import_films(['str', 5, {'title': 'Фильм'}], dry_run=True)
+        self.assertEqual(result.valid, 0)
+        self.assertEqual([number for number, errors in result.errors],
+                         [1, 2, 3])
+        self.assertIn('record', result.errors[0][1])
+
+
+class KeysetPageTest(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        # Повторяющиеся названия и даты: порядок держится на id
+        for number in range(11):
+            Film.objects.create(
+                title=f'Фильм {number % 3}', description='',
+                time=time(1, 30), country='', beginning=today,
+                ending=today + timedelta(days=number % 4),
+            )
+
+    def walk(self, fields, size):
+        pages, after = [], None
+        while True:
+            films, after = keyset_page(Film.objects.all(), fields, after,
+                                       size)
+            pages.append([film.pk for film in films])
+            if after is None:
+                return pages
+
+    def test_pages_cover_ordering_without_gaps(self):
+        for fields, ordering in ((ACTIVE_ORDER, ('title', 'id')),
+                                 (CATALOG_ORDER, ('-ending', 'title', 'id'))):
+            pages = self.walk(fields, 4)
+            self.assertEqual([len(page) for page in pages], [4, 4, 3])
+            self.assertEqual(
+                sum(pages, []),
+                list(Film.objects.order_by(*ordering).values_list(
+                    'pk', flat=True
+                ))
+            )
+
+    def test_broken_cursor_starts_from_first_page(self):
+        first, after = keyset_page(Film.objects.all(), ACTIVE_ORDER, size=4)
+        for cursor in ('garbage', 'W10', after[:-2]):
+            films, _ = keyset_page(Film.objects.all(), ACTIVE_ORDER, cursor,
+                                   4)
+            self.assertEqual(films, first)
+
+
+class FilmSearchTest(TestCase):
+    def create_film(self, title, country='', description='', days=10):
+        today = timezone.localdate()
+        return Film.objects.create(
+            title=title, description=description, time=time(1, 30),
+            country=country, beginning=today - timedelta(days=20),
+            ending=today + timedelta(days=days),
+        )
+
+    def search(self, query):
+        return [film.pk for film in search_films(query)[0]]
+
+    def test_title_outranks_country_and_description(self):
+        described = self.create_film('Туман', description='Россия зимой')
+        country = self.create_film('Берег', country='Россия')
+        titled = self.create_film('Россия вперёд')
+        self.create_film('Россия прошлого', days=-1)
+        self.assertEqual(self.search('россия'),
+                         [titled.pk, country.pk, described.pk])
+
+    def test_stemmed_query_matches_other_forms(self):
+        film = self.create_film('Морские фильмы')
+        self.assertEqual(self.search('фильмов'), [film.pk])
+        self.assertEqual(self.search('морской фильм'), [film.pk])
+        self.assertEqual(self.search('ёлка'), [])
+
+    def test_suggestions_match_unfinished_word(self):
+        film = self.create_film('Ёлки новогодние')
+        self.assertEqual(suggest_films('ёлк'),
+                         [{'title': film.title, 'slug': film.slug}])
+
+    def test_index_follows_save_and_delete(self):
+        film = self.create_film('Туман')
+        film.title = 'Гроза'
+        film.save()
+        self.assertEqual(self.search('туман'), [])
+        self.assertEqual(self.search('гроза'), [film.pk])
+        pk = film.pk
+        film.delete()
+        self.assertFalse(FilmSearchToken.objects.filter(film_id=pk).exists())
+
+
+class ScheduleAvailabilityTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today + timedelta(days=10),
+        )
+        hall = Hall.objects.create(number=1, count_rows=2, count_places=5)
+        self.session = Session.objects.create(
+            film=film, hall=hall, date=today + timedelta(days=1),
+            start_time=time(12, 0)
+        )
+        now = timezone.now()
+        for place, is_booked, held_until in (
+                (1, True, None), (2, True, None),
+                (3, False, now + timedelta(minutes=5)),
+                (4, False, now - timedelta(minutes=5))):
+            Booking.objects.create(
+                session_id=self.session.pk, row=1, place=place,
+                is_booked=is_booked, held_until=held_until
+            )
+
+    def sessions(self, days):
+        return [session for day in days for group in day['films']
+                for session in group['sessions']]
+
+    def test_counts_booked_and_live_holds(self):
+        days = schedule_days()
+        with self.assertNumQueries(1):
+            days = attach_availability(days)
+        [session] = self.sessions(days)
+        self.assertEqual((session.seats_total, session.seats_free), (10, 7))
+
+    def test_cached_sessions_are_not_changed(self):
+        attach_availability(schedule_days())
+        [session] = self.sessions(schedule_days())
+        self.assertFalse(hasattr(session, 'seats_taken'))
+
+    def test_api_reports_free_seats(self):
+        response = self.client.get(reverse('api_v1:schedule'),
+                                   {'availability': '1', 'days': 2})
+        sessions = [session for day in response.json()['days']
+                    for session in day['sessions']]
+        self.assertEqual([(item['free'], item['total']) for item in sessions],
+                         [(7, 10)])
+
+
+class ScheduleInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.localdate()
+        self.day = today + timedelta(days=1)
+        self.other_day = today + timedelta(days=2)
+        self.film = Film.objects.create(
+            title='Фильм', description='', time=time(1, 30), country='',
+            beginning=today, ending=today + timedelta(days=10),
+        )
+        self.hall = Hall.objects.create(number=1)
+        self.session = Session.objects.create(
+            film=self.film, hall=self.hall, date=self.day,
+            start_time=time(12, 0)
+        )
+        schedule_days()
+
+    def starts(self, day):
+        [schedule] = [item for item in schedule_days()
+                      if item['date'] == day]
+        return [session.start_time for group in schedule['films']
+                for session in group['sessions']]
+
+    def test_days_are_cached(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.starts(self.day), [time(12, 0)])
+
+    def test_saved_session_reloads_only_its_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Session.objects.create(film=self.film, hall=self.hall,
+                                   date=self.day, start_time=time(15, 0))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.starts(self.day),
+                             [time(12, 0), time(15, 0)])
+
+    def test_moved_session_reloads_both_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.date = self.other_day
+            self.session.save()
+        self.assertEqual(self.starts(self.day), [])
+        self.assertEqual(self.starts(self.other_day), [time(12, 0)])
+
+    def test_deleted_session_reloads_its_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.starts(self.day), [])
@@ -5,6 +5,8 @@ app_name = "films"
 
 urlpatterns = [
     path('', views.FilmListView.as_view(), name='film_list'),
+    path('search/suggest/', views.FilmSuggestView.as_view(),
+         name='film_suggest'),
     path('film/<slug:slug>/', views.FilmDetailView.as_view(),
          name='film_detail'),
     path('contacts/', views.ContactsView.as_view(), name='contacts'),
@@ -1,10 +1,17 @@
-from .models import Film
+from .conditional import conditional_availability, conditional_content
+from .models import ACTIVE_ORDER, Film
+from .schedule import SCHEDULE_DAYS, attach_availability, schedule_days
+from .search import search_films, suggest_films
 from admin_panel.models import Session
-from django.views.generic import ListView, DetailView, TemplateView
+from cinema.cache import namespace
+from cinema.pagination import decode_cursor, encode_cursor, keyset_page
+from django.http import JsonResponse
+from django.views.generic import ListView, DetailView, TemplateView, View
 from django.utils import timezone
 from datetime import timedelta
 
 
+@conditional_content
 class FilmListView(ListView):
     model = Film
     template_name = 'films/film_list.html'
@@ -12,15 +19,45 @@ class FilmListView(ListView):
 
     def get_queryset(self):
         today = timezone.now().date()
-        queryset = Film.objects.filter(ending__gte=today).order_by('title')
+        after = self.request.GET.get('after')
 
         query = self.request.GET.get('q', '').strip()
         if query:
-            queryset = queryset.filter(title__iregex=query)
+            films, self.next_cursor = search_films(query, after=after)
+            return films
+
+        def load_page():
+            return keyset_page(
+                Film.objects.filter(ending__gte=today), ACTIVE_ORDER, after
+            )
+
+        # Ключ строится из разобранного курсора: произвольные ?after=
+        # не должны плодить записи в кэше.
+        if after:
+            values = decode_cursor(Film, ACTIVE_ORDER, after)
+            if values is None:
+                films, self.next_cursor = load_page()
+                return films
+            after = encode_cursor(values)
+        films, self.next_cursor = namespace('catalog').get_or_set(
+            f'active:{today.isoformat()}:{after or ""}', load_page
+        )
+        return films
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = getattr(self, 'next_cursor', None)
+        return context
 
-        return queryset
 
+class FilmSuggestView(View):
+    def get(self, request):
+        return JsonResponse(
+            {'films': suggest_films(request.GET.get('q', ''))}
+        )
 
+
+@conditional_availability
 class FilmDetailView(DetailView):
     model = Film
     template_name = 'films/film_detail.html'
@@ -28,41 +65,31 @@ class FilmDetailView(DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.now().date()
+        context['sessions'] = Session.objects.filter(
+            film=self.object,
+            date__range=[today, today + timedelta(days=SCHEDULE_DAYS - 1)],
+        ).select_related('hall').with_availability().order_by(
+            'date', 'start_time'
+        )
+        return context
+
 
 class ContactsView(TemplateView):
     template_name = 'films/contacts.html'
 
 
+@conditional_availability
 class ScheduleView(TemplateView):
     template_name = 'films/schedule.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        start_date = timezone.now().date()
-        end_date = start_date + timedelta(days=13)
-        sessions = Session.objects.filter(
-            date__range=[start_date, end_date]
-        ).select_related('film', 'hall').order_by('date', 'start_time')
-
-        sessions_by_date = {}
-        for session in sessions:
-            date_str = session.date.strftime('%Y-%m-%d')
-            if date_str not in sessions_by_date:
-                sessions_by_date[date_str] = []
-            sessions_by_date[date_str].append(session)
-
-        dates = []
-        for i in range(14):
-            current_date = start_date + timedelta(days=i)
-            dates.append({
-                'date': current_date,
-                'sessions': sessions_by_date.get(
-                    current_date.strftime('%Y-%m-%d'), [])
-            })
-
+        today = timezone.now().date()
         context.update({
-            'dates': dates,
-            'today': start_date
+            'dates': attach_availability(schedule_days(today)),
+            'today': today
         })
-
         return context